@@ -4,11 +4,20 @@ __all__ = ["AuditLogger", "get_logger"]
 
 import json
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, see the "fast" extra
+    orjson = None
+
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from typing import BinaryIO
+
     from snbb_scheduler.config import SchedulerConfig
 
 logger = logging.getLogger(__name__)
@@ -70,6 +79,29 @@ _ROW_TEMPLATE = (
 )
 
 
+def _json_default(obj: object) -> str:
+    """Encode datetimes neither encoder handles natively (e.g. ``pd.Timestamp``)."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps_line(record: dict) -> bytes:
+    """Encode *record* as a single newline-terminated JSONL line."""
+    if orjson is not None:
+        return orjson.dumps(
+            record, default=_json_default, option=orjson.OPT_APPEND_NEWLINE
+        )
+    return (json.dumps(record, default=_json_default) + "\n").encode("utf-8")
+
+
+def _loads_line(line: bytes) -> dict:
+    """Decode a single JSONL line written by :func:`_dumps_line`."""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
 def _badge_class(event: str) -> str:
     known = {"submitted", "status_change", "error", "dry_run", "retry_cleared"}
     return event if event in known else "default"
@@ -102,11 +134,69 @@ def _render_html(records: list[dict]) -> str:
 
 
 class AuditLogger:
-    """Appends JSONL records to a log file and keeps an HTML report up to date."""
+    """Appends JSONL records to a log file and keeps an HTML report up to date.
+
+    A plain :meth:`log` call opens the log file, appends and closes it again.
+    Inside a :meth:`batch` block, or while the logger is used as a context
+    manager, the file is opened on the first write and kept open until the
+    block exits. Every record is flushed as soon as it is written, so readers
+    never see a partial log — except inside :meth:`batch`, which trades that
+    for fewer writes.
+    """
 
     def __init__(self, log_file: Path, report_dir: Path | None = None) -> None:
         self._log_file = log_file
         self._report_dir = report_dir
+        self._fh: BinaryIO | None = None
+        self._hold = 0  # open blocks that keep the file handle between writes
+        self._buffer: list[bytes] | None = None
+        self._flush_every = 0
+
+    def __enter__(self) -> AuditLogger:
+        self._hold += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._release()
+
+    @contextmanager
+    def batch(self, flush_every: int = 100) -> Iterator[AuditLogger]:
+        """Buffer records and write them in chunks of *flush_every*.
+
+        Inside the block, :meth:`log` only encodes records; they are written
+        in a single call whenever *flush_every* records have accumulated and
+        when the block exits (also on error). The HTML report is refreshed
+        once on exit instead of after every record. Nested calls join the
+        outer batch.
+        """
+        if self._buffer is not None:
+            yield self
+            return
+        self._buffer = []
+        self._flush_every = flush_every
+        self._hold += 1
+        try:
+            yield self
+        finally:
+            try:
+                self._flush_buffer()
+            finally:
+                self._buffer = None
+                self._release()
+            if self._report_dir is not None:
+                self._write_html_report()
+
+    def close(self) -> None:
+        """Close the underlying log file handle, if open."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _release(self) -> None:
+        """Leave a :meth:`batch` or ``with`` block, closing the last one out."""
+        self._hold -= 1
+        if self._hold == 0:
+            self.close()
 
     def log(
         self,
@@ -119,11 +209,17 @@ class AuditLogger:
         old_status: str | None = None,
         new_status: str | None = None,
         detail: str = "",
+        timestamp: datetime | None = None,
         **extra,
     ) -> None:
-        """Append a single JSONL record and refresh the HTML report."""
+        """Append a single JSONL record and refresh the HTML report.
+
+        *timestamp* defaults to the current UTC time; callers logging many
+        events for one logical action (e.g. a manifest submission) can pass a
+        single shared value instead.
+        """
         record: dict = {
-            "timestamp": datetime.now(tz=timezone.utc).isoformat(),
+            "timestamp": timestamp or datetime.now(tz=timezone.utc),
             "event": event,
             "subject": subject,
             "session": session,
@@ -139,23 +235,44 @@ class AuditLogger:
             record["detail"] = detail
         record.update(extra)
 
-        self._log_file.parent.mkdir(parents=True, exist_ok=True)
-        with self._log_file.open("a") as f:
-            f.write(json.dumps(record) + "\n")
+        line = _dumps_line(record)
+        if self._buffer is not None:
+            self._buffer.append(line)
+            if len(self._buffer) >= self._flush_every:
+                self._flush_buffer()
+            return
+
+        self._write(line)
 
         if self._report_dir is not None:
             self._write_html_report()
 
+    def _write(self, data: bytes) -> None:
+        """Append encoded JSONL *data* to the log file and flush it."""
+        if self._fh is None:
+            self._log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = self._log_file.open("ab")
+        self._fh.write(data)
+        self._fh.flush()
+        if not self._hold:
+            self.close()
+
+    def _flush_buffer(self) -> None:
+        """Write all buffered records in one call and empty the buffer."""
+        if self._buffer:
+            self._write(b"".join(self._buffer))
+            self._buffer.clear()
+
     def _write_html_report(self) -> None:
         """Regenerate audit_report.html in report_dir from the current JSONL log."""
         records: list[dict] = []
         if self._log_file.exists():
-            for line in self._log_file.read_text(encoding="utf-8").splitlines():
+            for line in self._log_file.read_bytes().splitlines():
                 line = line.strip()
                 if line:
                     try:
-                        records.append(json.loads(line))
-                    except json.JSONDecodeError:
+                        records.append(_loads_line(line))
+                    except json.JSONDecodeError:  # orjson's error subclasses it
                         pass
 
         self._report_dir.mkdir(parents=True, exist_ok=True)  # type: ignore[union-attr]
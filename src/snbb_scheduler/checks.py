@@ -2,6 +2,11 @@ from __future__ import annotations
 
 __all__ = ["is_complete", "check_detailed", "FileCheckResult"]
 
+import fnmatch
+import functools
+import os
+import re
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Callable
@@ -39,6 +44,61 @@ def _register_check(name: str):
     return decorator
 
 
+# ---------------------------------------------------------------------------
+# Generic completion_marker strategies
+# ---------------------------------------------------------------------------
+# A missing output_path needs no separate exists() guard: each strategy
+# already finds nothing there.
+
+
+def _check_nonempty(proc: Procedure, output_path: Path, **kwargs) -> bool:
+    return _dir_nonempty(output_path)
+
+
+def _check_marker(proc: Procedure, output_path: Path, **kwargs) -> bool:
+    return _marker_found(output_path, proc.completion_marker)
+
+
+def _check_marker_list(proc: Procedure, output_path: Path, **kwargs) -> bool:
+    markers = proc.completion_marker
+    if not markers:
+        # Vacuously complete, but only once the output directory exists.
+        return output_path.exists()
+    by_dir: dict[str, list[str]] = {}
+    rest: list[str] = []
+    for pat in markers:
+        base, _, leaf = pat.rpartition("/")
+        if leaf != "**" and _is_glob(leaf) and not _is_glob(base):
+            by_dir.setdefault(base, []).append(leaf)
+        else:
+            rest.append(pat)
+    return all(
+        _leaves_found(output_path, base, leaves) for base, leaves in by_dir.items()
+    ) and all(_marker_found(output_path, pat) for pat in rest)
+
+
+def _leaves_found(root: Path, base: str, leaves: list[str]) -> bool:
+    """Return True if every glob in *leaves* matches an entry of ``root/base``.
+
+    The directory is listed once for all of its patterns.
+    """
+    try:
+        with os.scandir(os.path.join(root, base)) as it:
+            names = [entry.name for entry in it]
+    except OSError:
+        return False
+    matchers = [_compile_glob(leaf)[0] for leaf in leaves]
+    return all(any(m.match(name) for name in names) for m in matchers)
+
+
+# Maps type(completion_marker) → strategy, used when no specialized check applies
+_MARKER_CHECKS: dict[type, Callable] = {
+    type(None): _check_nonempty,
+    str: _check_marker,
+    list: _check_marker_list,
+}
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -54,30 +114,16 @@ def is_complete(proc: Procedure, output_path: Path, **kwargs) -> bool:
       ["pat1", ...] — ALL patterns must match at least one file
 
     Procedures registered in ``_SPECIALIZED_CHECKS`` use a custom check
-    function instead and are called **before** the ``output_path.exists()``
-    guard, allowing them to remap paths (e.g. FreeSurfer's longitudinal
+    function instead, which may remap paths (e.g. FreeSurfer's longitudinal
     SUBJECTS_DIR naming differs from the scheduler's path convention).
+    Otherwise the strategy is looked up in ``_MARKER_CHECKS`` by marker type.
 
     Unknown keyword arguments are silently ignored.
     """
-    if proc.name in _SPECIALIZED_CHECKS:
-        return _SPECIALIZED_CHECKS[proc.name](proc, output_path, **kwargs)
-
-    if not output_path.exists():
-        return False
-
-    marker = proc.completion_marker
-
-    if marker is None:
-        return _dir_nonempty(output_path)
-
-    if isinstance(marker, list):
-        return all(any(output_path.glob(pat)) for pat in marker)
-
-    if _is_glob(marker):
-        return any(output_path.glob(marker))
-
-    return (output_path / marker).exists()
+    check = _SPECIALIZED_CHECKS.get(proc.name) or _MARKER_CHECKS[
+        type(proc.completion_marker)
+    ]
+    return check(proc, output_path, **kwargs)
 
 
 def check_detailed(
@@ -114,7 +160,7 @@ def check_detailed(
     if isinstance(marker, list):
         results = []
         for pat in marker:
-            matched = list(output_path.glob(pat))
+            matched = list(_iglob(output_path, pat))
             results.append(
                 FileCheckResult(
                     pattern=pat,
@@ -125,7 +171,7 @@ def check_detailed(
         return results
 
     if _is_glob(marker):
-        matched = list(output_path.glob(marker))
+        matched = list(_iglob(output_path, marker))
         return [
             FileCheckResult(
                 pattern=marker,
@@ -135,11 +181,12 @@ def check_detailed(
         ]
 
     target = output_path / marker
+    found = target.exists()
     return [
         FileCheckResult(
             pattern=marker,
-            found=target.exists(),
-            matched_files=[str(target)] if target.exists() else [],
+            found=found,
+            matched_files=[str(target)] if found else [],
         )
     ]
 
@@ -325,12 +372,133 @@ def _is_glob(pattern: str) -> bool:
     return "*" in pattern or "?" in pattern or "[" in pattern
 
 
+def _marker_found(root: Path, pattern: str) -> bool:
+    """Return True if *pattern* matches at least one path under *root*.
+
+    Literal markers skip the glob machinery entirely and cost one ``stat``.
+    """
+    if not _is_glob(pattern):
+        return os.path.exists(os.path.join(root, pattern))
+    return any(_iglob(root, pattern))
+
+
+@dataclass(frozen=True)
+class _StarMatch:
+    """Matcher for a segment with a single ``*`` (e.g. ``*_T1w.nii.gz``, ``ses-*``).
+
+    Equivalent to the fnmatch regex, but a prefix/suffix comparison.
+    """
+
+    prefix: str
+    suffix: str
+
+    def match(self, name: str) -> bool:
+        return (
+            len(name) >= len(self.prefix) + len(self.suffix)
+            and name.startswith(self.prefix)
+            and name.endswith(self.suffix)
+        )
+
+
+def _translate_segment(segment: str) -> re.Pattern | _StarMatch | str | None:
+    """Compile one ``/``-separated glob segment.
+
+    Returns ``None`` for ``**``, the segment itself when it has no glob
+    metacharacters, a :class:`_StarMatch` when its only metacharacter is a
+    single ``*``, and otherwise a regex matching a single path component.
+    """
+    if segment == "**":
+        return None
+    if not _is_glob(segment):
+        return segment
+    prefix, star, suffix = segment.partition("*")
+    if star and not _is_glob(prefix) and not _is_glob(suffix):
+        return _StarMatch(prefix, suffix)
+    return re.compile(fnmatch.translate(segment))
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> tuple[re.Pattern | _StarMatch | str | None, ...]:
+    """Split *pattern* into compiled segments (see :func:`_translate_segment`)."""
+    return tuple(_translate_segment(seg) for seg in pattern.split("/") if seg)
+
+
+def _iglob(root: Path, pattern: str) -> Iterator[str]:
+    """Yield paths under *root* matching the relative glob *pattern*.
+
+    Matches like ``root.glob(pattern)`` for the patterns used as completion
+    markers, but walks with :func:`os.scandir` against per-segment regexes
+    that are compiled once per pattern, and resolves literal segments with
+    a single existence check instead of a directory listing. Paths are
+    yielded lazily as strings, so ``any()`` stops at the first match.
+    """
+    segments = _compile_glob(pattern)
+    if not segments or segments[-1] is None:
+        # Trailing "**" selects directories only; leave that to pathlib.
+        yield from map(str, root.glob(pattern))
+        return
+    seen: set[str] = set()
+    for path in _match_segments(os.fspath(root), segments, 0):
+        if path not in seen:
+            seen.add(path)
+            yield path
+
+
+def _match_segments(
+    dirpath: str, segments: tuple[re.Pattern | _StarMatch | str | None, ...], i: int
+) -> Iterator[str]:
+    """Recursive worker for :func:`_iglob`, matching ``segments[i:]`` in *dirpath*."""
+    segment = segments[i]
+    last = i == len(segments) - 1
+
+    if isinstance(segment, str):
+        path = os.path.join(dirpath, segment)
+        if last:
+            if os.path.exists(path):
+                yield path
+        elif os.path.isdir(path):
+            yield from _match_segments(path, segments, i + 1)
+        return
+
+    try:
+        with os.scandir(dirpath) as it:
+            entries = list(it)
+    except OSError:
+        return
+
+    if segment is None:
+        # "**" matches zero or more directories (symlinked dirs are not followed).
+        yield from _match_segments(dirpath, segments, i + 1)
+        for entry in entries:
+            if _is_real_dir(entry):
+                yield from _match_segments(entry.path, segments, i)
+        return
+
+    for entry in entries:
+        if segment.match(entry.name):
+            if last:
+                yield entry.path
+            elif _is_dir(entry):
+                yield from _match_segments(entry.path, segments, i + 1)
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _is_real_dir(entry: os.DirEntry) -> bool:
+    return _is_dir(entry) and not entry.is_symlink()
+
+
 def _dir_nonempty(path: Path) -> bool:
     """Return True if *path* is an existing directory that contains at least one entry."""
     try:
-        next(path.iterdir())
-        return True
-    except (StopIteration, FileNotFoundError, NotADirectoryError):
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
         return False
 
 
@@ -342,32 +510,59 @@ def _count_recon_all_inputs(done_file: Path) -> int:
     ``-i <path>`` pair for each T1w input.  This function parses that line
     and returns the number of ``-i`` tokens found.
     """
-    for line in done_file.read_text().splitlines():
-        if "CMDARGS" in line:
-            return sum(1 for token in line.split() if token == "-i")
+    with done_file.open() as f:
+        for line in f:
+            if "CMDARGS" in line:
+                return line.split().count("-i")
     return 0
 
 
 def _count_available_t1w(bids_root: Path, subject: str) -> int:
     """Count T1w NIfTI files that would be passed to ``recon-all`` for *subject*.
 
-    Delegates to :func:`snbb_scheduler.freesurfer.collect_images` so that the
-    same filtering rules (exclude defaced, prefer ``rec-norm``) are applied
-    here and during actual job execution.
+    Lists only ``ses-*/anat`` with :func:`_scan_dir` instead of
+    globbing the subject tree, then applies the same selection rules as
+    :func:`snbb_scheduler.freesurfer.collect_images` (exclude defaced,
+    prefer ``rec-norm``) so the count matches what the job will use.
     """
-    from snbb_scheduler.freesurfer import collect_images
+    from snbb_scheduler.freesurfer import _select_images
+
+    subject_dir = bids_root / subject
+    t1w = [
+        subject_dir / ses / "anat" / name
+        for ses in _ses_dir_names(subject_dir)
+        for name, _ in _scan_dir(subject_dir / ses / "anat")
+        if name.endswith("_T1w.nii.gz")
+    ]
+    return len(_select_images(t1w))
 
-    t1w, _ = collect_images(bids_root, subject)
-    return len(t1w)
+
+def _scan_dir(path: Path) -> tuple[tuple[str, bool], ...]:
+    """Return ``(name, is_dir)`` for every entry of *path*, or ``()`` if unreadable.
+
+    One ``os.scandir`` pass; ``is_dir`` comes from the directory entry's
+    cached type where the platform provides it, so no per-child ``stat``.
+    Shared by every helper that lists the same subject directory.
+    """
+    try:
+        with os.scandir(path) as it:
+            return tuple((entry.name, _is_dir(entry)) for entry in it)
+    except OSError:
+        return ()
+
+
+def _ses_dir_names(subject_dir: Path) -> list[str]:
+    """Names of the ``ses-*`` subdirectories of *subject_dir*."""
+    return [
+        name
+        for name, is_dir in _scan_dir(subject_dir)
+        if is_dir and name.startswith("ses-")
+    ]
 
 
 def _count_subject_ses_dirs(subject_dir: Path) -> int:
     """Count ``ses-*`` subdirectories inside *subject_dir*."""
-    if not subject_dir.exists():
-        return 0
-    return sum(
-        1 for d in subject_dir.iterdir() if d.is_dir() and d.name.startswith("ses-")
-    )
+    return len(_ses_dir_names(subject_dir))
 
 
 def _count_bids_anat_sessions(bids_root: Path, subject: str) -> list[str]:
@@ -377,14 +572,10 @@ def _count_bids_anat_sessions(bids_root: Path, subject: str) -> list[str]:
     ``<bids_root>/<subject>``.
     """
     subject_dir = bids_root / subject
-    if not subject_dir.exists():
-        return []
     return sorted(
-        ses_dir.name
-        for ses_dir in subject_dir.iterdir()
-        if ses_dir.is_dir()
-        and ses_dir.name.startswith("ses-")
-        and any((ses_dir / "anat").glob("*_T1w.nii.gz"))
+        name
+        for name in _ses_dir_names(subject_dir)
+        if any((subject_dir / name / "anat").glob("*_T1w.nii.gz"))
     )
 
 
@@ -395,12 +586,8 @@ def _count_bids_dwi_sessions(bids_root: Path, subject: str) -> int:
     ``<bids_root>/<subject>``.
     """
     subject_dir = bids_root / subject
-    if not subject_dir.exists():
-        return 0
     return sum(
         1
-        for ses_dir in subject_dir.iterdir()
-        if ses_dir.is_dir()
-        and ses_dir.name.startswith("ses-")
-        and any((ses_dir / "dwi").glob("*_dwi.nii.gz"))
+        for name in _ses_dir_names(subject_dir)
+        if any((subject_dir / name / "dwi").glob("*_dwi.nii.gz"))
     )
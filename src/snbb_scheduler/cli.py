@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import dataclasses
 import logging
+from pathlib import Path
 
 import click
 import pandas as pd
@@ -16,7 +18,7 @@ from snbb_scheduler.manifest import (
 )
 from snbb_scheduler.monitor import update_state_from_sacct
 from snbb_scheduler.sessions import build_session_status_table, discover_sessions
-from snbb_scheduler.submit import submit_manifest
+from snbb_scheduler.submit import SubmissionError, submit_manifest
 
 
 @click.group()
@@ -60,14 +62,21 @@ def main(
     """snbb-scheduler: rule-based scheduler for the SNBB neuroimaging pipeline."""
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
     ctx.ensure_object(dict)
-    config = SchedulerConfig.from_yaml(config_path) if config_path else SchedulerConfig()
+    # A config passed in via ``obj`` (e.g. when embedding or testing the CLI)
+    # is used as-is unless --config names a file explicitly.
+    config = ctx.obj.get("config")
+    if config_path or config is None:
+        config = SchedulerConfig.from_yaml(config_path) if config_path else SchedulerConfig()
+    # Overrides go on a copy so an injected config is left untouched.
+    overrides = {}
     if slurm_mem is not None:
-        config.slurm_mem = slurm_mem
+        overrides["slurm_mem"] = slurm_mem
     if slurm_cpus is not None:
-        config.slurm_cpus_per_task = slurm_cpus
+        overrides["slurm_cpus_per_task"] = slurm_cpus
     if slurm_log_dir is not None:
-        from pathlib import Path
-        config.slurm_log_dir = Path(slurm_log_dir)
+        overrides["slurm_log_dir"] = Path(slurm_log_dir)
+    if overrides:
+        config = dataclasses.replace(config, **overrides)
     ctx.obj["config"] = config
 
 
@@ -134,17 +143,34 @@ def run(
         click.echo("Nothing to submit.")
         return
 
-    new_state = submit_manifest(manifest, config, dry_run=dry_run, audit=audit)
+    try:
+        new_state = submit_manifest(manifest, config, dry_run=dry_run, audit=audit)
+    except SubmissionError as exc:
+        # Track the jobs that did reach Slurm so the next run skips them.
+        if not exc.submitted.empty:
+            _save_new_state(state, exc.submitted, config)
+            click.echo(
+                f"Recorded {len(exc.submitted)} submitted job(s) in {config.state_file}.",
+                err=True,
+            )
+        raise
 
     if not dry_run:
-        parts = [df for df in (state, new_state) if not df.empty]
-        combined = pd.concat(parts, ignore_index=True) if parts else new_state
-        save_state(combined, config)
+        _save_new_state(state, new_state, config)
         click.echo(f"Submitted {len(new_state)} job(s). State saved to {config.state_file}.")
     else:
         click.echo(f"[DRY RUN] Would submit {len(new_state)} job(s).")
 
 
+def _save_new_state(
+    state: pd.DataFrame, new_state: pd.DataFrame, config: SchedulerConfig
+) -> None:
+    """Append *new_state* rows to *state* and persist the result."""
+    parts = [df for df in (state, new_state) if not df.empty]
+    combined = pd.concat(parts, ignore_index=True) if parts else new_state
+    save_state(combined, config)
+
+
 @main.command(name="manifest")
 @click.pass_context
 def show_manifest(ctx: click.Context) -> None:
@@ -195,9 +221,11 @@ def status(ctx: click.Context) -> None:
     if config.slurm_log_dir is not None:
         from snbb_scheduler.submit import _build_job_name
 
+        procs = {p.name: p for p in config.procedures}
+
         def _log_path(row: pd.Series) -> str:
             try:
-                proc = config.get_procedure(row["procedure"])
+                proc = procs[row["procedure"]]
                 job_name = _build_job_name(row, proc.scope)
             except KeyError:
                 job_name = f"{row['procedure']}_{row['subject']}"
@@ -337,8 +365,6 @@ def audit(
     history: bool,
 ) -> None:
     """Validate outputs, analyze logs, and generate audit reports."""
-    from pathlib import Path
-
     from snbb_scheduler.auditor import run_full_audit
     from snbb_scheduler.report import (
         compare_reports,
@@ -137,6 +137,8 @@ class SchedulerConfig:
     slurm_account: str = "snbb"
     slurm_mem: str | None = None  # e.g. "32G"; omitted from sbatch if None
     slurm_cpus_per_task: int | None = None  # e.g. 8; omitted from sbatch if None
+    # Max sbatch processes in flight at once; 1 submits strictly one after another.
+    slurm_max_concurrent_submits: int = 1
 
     # State tracking
     state_file: Path = field(
@@ -222,6 +224,18 @@ class SchedulerConfig:
             except yaml.YAMLError as exc:
                 raise ValueError(f"Invalid YAML in {path}: {exc}") from exc
 
+        return cls.from_mapping(data)
+
+    @classmethod
+    def from_mapping(cls, mapping: dict) -> "SchedulerConfig":
+        """Build a config from an already-parsed mapping, overriding defaults.
+
+        Accepts the same keys and plain values as a YAML config file: path
+        fields become ``Path`` objects and the ``procedures`` / ``audit``
+        entries become :class:`Procedure` / :class:`AuditConfig` instances.
+        *mapping* itself is not modified.
+        """
+        data = dict(mapping)
         path_fields = {
             "dicom_root",
             "bids_root",
@@ -240,7 +254,7 @@ class SchedulerConfig:
             data["procedures"] = [Procedure(**p) for p in data["procedures"]]
 
         if "audit" in data:
-            audit_data = data["audit"] or {}
+            audit_data = dict(data["audit"] or {})
             if "report_dir" in audit_data and audit_data["report_dir"] is not None:
                 audit_data["report_dir"] = Path(audit_data["report_dir"])
             data["audit"] = AuditConfig(**audit_data)
@@ -32,7 +32,8 @@ T1w/T2w selection rules
 ------------------------
 **Across-session collection** (:func:`collect_images`):
   Globs all sessions and returns all qualifying files as a flat list.
-  Used by :func:`~snbb_scheduler.checks._count_available_t1w`.
+  :func:`~snbb_scheduler.checks._count_available_t1w` counts T1w inputs with
+  the same rules (shared via ``_select_images``).
 
 **Per-session collection** (:func:`collect_session_t1w`, :func:`collect_session_t2w`):
   One file per session with two-step filtering:
@@ -96,24 +97,21 @@ def collect_images(bids_dir: Path, subject: str) -> tuple[list[Path], list[Path]
     2. If any ``rec-norm`` variant survives, keep only those; otherwise keep
        all remaining files.
 
-    Used by :func:`~snbb_scheduler.checks._count_available_t1w` and as a
-    fallback for the completion check.
+    :func:`~snbb_scheduler.checks._count_available_t1w` applies the same
+    rules (via :func:`_select_images`) when counting T1w inputs.
     """
-    t1w = sorted(bids_dir.glob(f"{subject}/ses-*/anat/*_T1w.nii.gz"))
-    t1w = [f for f in t1w if "defaced" not in f.name]
-    t1w_rec = [f for f in t1w if "rec-norm" in f.name]
-    if t1w_rec:
-        t1w = t1w_rec
-
-    t2w = sorted(bids_dir.glob(f"{subject}/ses-*/anat/*_T2w.nii.gz"))
-    t2w = [f for f in t2w if "defaced" not in f.name]
-    t2w_rec = [f for f in t2w if "rec-norm" in f.name]
-    if t2w_rec:
-        t2w = t2w_rec
-
+    t1w = _select_images(sorted(bids_dir.glob(f"{subject}/ses-*/anat/*_T1w.nii.gz")))
+    t2w = _select_images(sorted(bids_dir.glob(f"{subject}/ses-*/anat/*_T2w.nii.gz")))
     return t1w, t2w
 
 
+def _select_images(files: list[Path]) -> list[Path]:
+    """Drop ``defaced`` files, then keep only ``rec-norm`` variants if any remain."""
+    files = [f for f in files if "defaced" not in f.name]
+    rec_norm = [f for f in files if "rec-norm" in f.name]
+    return rec_norm or files
+
+
 # ---------------------------------------------------------------------------
 # Image collection — per session (for longitudinal pipeline)
 # ---------------------------------------------------------------------------
@@ -24,6 +24,9 @@ _STATE_COLUMNS = {
     "job_id": "object",
 }
 
+# State file suffixes stored as uncompressed Arrow IPC instead of parquet
+_FEATHER_SUFFIXES = frozenset({".feather", ".arrow"})
+
 
 def build_manifest(
     sessions: pd.DataFrame,
@@ -84,19 +87,31 @@ def build_manifest(
     return pd.DataFrame(rows).sort_values("priority").reset_index(drop=True)
 
 
+def _is_feather(path: Path) -> bool:
+    """Return True if *path* names an Arrow IPC (feather) state file."""
+    return Path(path).suffix in _FEATHER_SUFFIXES
+
+
 def load_state(config: SchedulerConfig) -> pd.DataFrame:
-    """Load the state parquet file.
+    """Load the state file (parquet, or feather for ``.feather``/``.arrow``).
 
     Returns an empty DataFrame with the correct schema if the file does not exist.
     """
     if not Path(config.state_file).exists():
         return _empty_state()
+    if _is_feather(config.state_file):
+        return pd.read_feather(config.state_file)
     return pd.read_parquet(config.state_file)
 
 
 def save_state(state: pd.DataFrame, config: SchedulerConfig) -> None:
-    """Persist the state DataFrame to the parquet state file."""
+    """Persist the state DataFrame to the state file, in the format its suffix names."""
     Path(config.state_file).parent.mkdir(parents=True, exist_ok=True)
+    if _is_feather(config.state_file):
+        state.reset_index(drop=True).to_feather(
+            config.state_file, compression="uncompressed"
+        )
+        return
     state.to_parquet(config.state_file, index=False)
 
 
@@ -140,13 +155,15 @@ def reconcile_with_filesystem(
         return state.copy()
 
     updated = state.copy()
+    # Many in-flight rows share a procedure; resolve each name only once.
+    procs = {p.name: p for p in config.procedures}
     for idx in state[in_flight_mask].index:
         row = state.loc[idx]
         proc_name = row["procedure"]
         subject = row["subject"]
         session = row["session"]
         try:
-            proc = config.get_procedure(proc_name)
+            proc = procs[proc_name]
         except KeyError:
             continue
 
@@ -127,22 +127,23 @@ def _make_rule(
     # Other subject-scoped procedures (e.g. ``qsiprep``, ``qsirecon``)
     # check the current session row's dependency path, which is the original
     # per-row behaviour.
-    cross_scope_deps: list[str] = []
-    same_scope_deps: list[str] = []
+    # Dependencies are resolved to Procedure objects here too, so the closure
+    # never looks them up by name per row.
+    cross_scope_deps: list[tuple[str, Procedure]] = []
+    same_scope_deps: list[tuple[str, Procedure]] = []
     for dep_name in proc.depends_on:
         dep_proc = config.get_procedure(dep_name)
         if proc.name == "freesurfer" and dep_proc.scope == "session":
-            cross_scope_deps.append(dep_name)
+            cross_scope_deps.append((dep_name, dep_proc))
         else:
-            same_scope_deps.append(dep_name)
+            same_scope_deps.append((dep_name, dep_proc))
 
     def rule(row: pd.Series) -> bool:
         if not row["dicom_exists"]:
             return False
 
         # ── Same-scope dependencies (existing logic) ──────────────────────
-        for dep_name in same_scope_deps:
-            dep_proc = config.get_procedure(dep_name)
+        for dep_name, dep_proc in same_scope_deps:
             dep_kwargs = _completion_kwargs(dep_proc, row, config)
             if not is_complete(dep_proc, row[f"{dep_name}_path"], **dep_kwargs):
                 return False
@@ -153,8 +154,7 @@ def _make_rule(
         if cross_scope_deps and sessions_df is not None:
             subject = row["subject"]
             subject_rows = sessions_df[sessions_df["subject"] == subject]
-            for dep_name in cross_scope_deps:
-                dep_proc = config.get_procedure(dep_name)
+            for dep_name, dep_proc in cross_scope_deps:
                 for _, srow in subject_rows.iterrows():
                     if not srow.get("dicom_exists", False):
                         continue
@@ -1,53 +1,190 @@
 from __future__ import annotations
 
-__all__ = ["submit_task", "submit_manifest"]
+__all__ = ["submit_task", "submit_manifest", "SubmissionError"]
 
+import asyncio
+import contextlib
 import logging
+import re
+import shlex
 import subprocess
-from datetime import datetime, timezone
+import time
+from datetime import datetime
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pandas as pd
 
-from snbb_scheduler.config import SchedulerConfig
+from snbb_scheduler.config import Procedure, SchedulerConfig
 
 if TYPE_CHECKING:
     from snbb_scheduler.audit import AuditLogger
 
 logger = logging.getLogger(__name__)
 
+# sbatch stdout: b"Submitted batch job 12345" — matched on raw bytes so the
+# (tiny, ASCII) output never needs a text decoder.
+_SBATCH_RE = re.compile(rb"\s*Submitted batch job (\S+)")
+
+
+class SubmissionError(RuntimeError):
+    """A manifest submission stopped at a failed sbatch call.
+
+    ``submitted`` holds the new state rows, as :func:`submit_manifest` would
+    return them, for the tasks that did reach Slurm before the failure. The
+    original error is chained as ``__cause__``.
+    """
+
+    def __init__(self, message: str, submitted: pd.DataFrame) -> None:
+        super().__init__(message)
+        self.submitted = submitted
+
+
+def _job_name(procedure: str, subject: str, session: str, proc_scope: str) -> str:
+    """Return the Slurm job name for a procedure/subject/session triple."""
+    if proc_scope == "subject":
+        return f"{procedure}_{subject}"
+    return f"{procedure}_{subject}_{session}"
+
 
 def _build_job_name(row: pd.Series, proc_scope: str) -> str:
     """Return the Slurm job name for a manifest row."""
-    if proc_scope == "subject":
-        return f"{row['procedure']}_{row['subject']}"
-    return f"{row['procedure']}_{row['subject']}_{row['session']}"
+    return _job_name(row["procedure"], row["subject"], row["session"], proc_scope)
+
+
+def _build_job_names(manifest: pd.DataFrame, procs: dict[str, Procedure]) -> list[str]:
+    """Vectorised :func:`_job_name` over every row of *manifest*."""
+    base = manifest["procedure"].astype(str) + "_" + manifest["subject"].astype(str)
+    subject_scoped = manifest["procedure"].map(
+        {name: proc.scope == "subject" for name, proc in procs.items()}
+    ).astype(bool)
+    return base.where(subject_scoped, base + "_" + manifest["session"].astype(str)).tolist()
+
+
+def _slurm_flags(config: SchedulerConfig) -> tuple[list[str], list[str]]:
+    """Return the sbatch flags that are the same for every task of *config*.
+
+    The two lists go before and after the per-task ``--job-name`` flag,
+    preserving the historical argument order.
+    """
+    before = []
+    if config.slurm_partition:
+        before.append(f"--partition={config.slurm_partition}")
+    before.append(f"--account={config.slurm_account}")
+    after = []
+    if config.slurm_mem:
+        after.append(f"--mem={config.slurm_mem}")
+    if config.slurm_cpus_per_task:
+        after.append(f"--cpus-per-task={config.slurm_cpus_per_task}")
+    return before, after
+
+
+def _build_command(
+    proc: Procedure,
+    subject: str,
+    session: str,
+    config: SchedulerConfig,
+    *,
+    job_name: str | None = None,
+    dicom_path: str | Path | None = None,
+    create_log_dir: bool = True,
+    flags: tuple[list[str], list[str]] | None = None,
+) -> list[str]:
+    """Return the sbatch argv for one task.
+
+    The per-procedure Slurm log directory is created only when
+    *create_log_dir* is true (i.e. not for dry runs). *flags* is the
+    result of :func:`_slurm_flags`, which callers building many commands
+    should compute once.
+    """
+    if job_name is None:
+        job_name = _job_name(proc.name, subject, session, proc.scope)
+    before, after = flags if flags is not None else _slurm_flags(config)
+    cmd = ["sbatch", *before, "--job-name=" + job_name, *after]
+    if config.slurm_log_dir is not None:
+        log_subdir = config.slurm_log_dir / proc.name
+        if create_log_dir:
+            log_subdir.mkdir(parents=True, exist_ok=True)
+        log_prefix = f"{log_subdir}/{job_name}_%j"
+        cmd.append("--output=" + log_prefix + ".out")
+        cmd.append("--error=" + log_prefix + ".err")
+    cmd.append(proc.script)
+    cmd.append(subject)
+    if proc.scope != "subject":
+        cmd.append(session)
+        if dicom_path is not None and not (isinstance(dicom_path, float) and pd.isna(dicom_path)):
+            cmd.append(str(dicom_path))
+    return cmd
+
+
+def _parse_job_id(stdout: bytes) -> str:
+    """Extract the job ID from sbatch's stdout.
+
+    Raises
+    ------
+    RuntimeError
+        If *stdout* does not match ``"Submitted batch job <ID>"``.
+    """
+    match = _SBATCH_RE.match(stdout)
+    if match is None:
+        output = stdout.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(
+            f"Unexpected sbatch output: {output!r}. "
+            "Expected format: 'Submitted batch job <ID>'"
+        )
+    return match.group(1).decode("ascii")
 
 
 def submit_task(
-    row: pd.Series,
+    procedure: str | Procedure,
+    subject: str,
+    session: str,
     config: SchedulerConfig,
     dry_run: bool = False,
     audit: AuditLogger | None = None,
+    *,
+    dicom_path: str | Path | None = None,
+    timestamp: datetime | None = None,
+    job_name: str | None = None,
+    flags: tuple[list[str], list[str]] | None = None,
 ) -> str | None:
     """Submit a single task to Slurm via sbatch.
 
-    Builds the sbatch command from the procedure's script and the row's
+    Builds the sbatch command from the procedure's script and the given
     subject/session values. The ``--partition`` flag is included only when
     ``config.slurm_partition`` is non-empty, so sites that do not use
     Slurm partitions can leave the field blank.
 
     Parameters
     ----------
-    row:
-        A manifest row with at least ``procedure``, ``subject``, and
-        ``session`` keys.
+    procedure:
+        The :class:`~snbb_scheduler.config.Procedure` to submit, or its name
+        (looked up in ``config.procedures``).
+    subject:
+        Subject label, e.g. ``"sub-0001"``.
+    session:
+        Session label, e.g. ``"ses-01"``; ignored for subject-scoped
+        procedures.
     config:
         Scheduler configuration supplying Slurm settings and the procedure
         registry.
     dry_run:
         When *True*, prints the command that would be run and returns *None*
-        without calling sbatch.
+        without calling sbatch or creating the Slurm log directory.
+    audit:
+        Optional audit logger receiving ``submitted``, ``error``, or
+        ``dry_run`` events.
+    dicom_path:
+        Optional DICOM directory passed as a third script argument for
+        session-scoped procedures. Missing values (*None* / NaN) are skipped.
+    timestamp:
+        Timestamp recorded on audit events; defaults to the time of logging.
+    job_name:
+        Precomputed Slurm job name; derived from the procedure scope,
+        subject and session when omitted.
+    flags:
+        Precomputed per-config sbatch flags from :func:`_slurm_flags`;
+        derived from *config* when omitted.
 
     Returns
     -------
@@ -62,75 +199,75 @@ def submit_task(
     subprocess.CalledProcessError
         If sbatch exits with a non-zero status.
     """
-    proc = config.get_procedure(row["procedure"])
-    job_name = _build_job_name(row, proc.scope)
-    cmd = ["sbatch"]
-    if config.slurm_partition:
-        cmd.append(f"--partition={config.slurm_partition}")
-    cmd.append(f"--account={config.slurm_account}")
-    cmd.append(f"--job-name={job_name}")
-    if config.slurm_mem:
-        cmd.append(f"--mem={config.slurm_mem}")
-    if config.slurm_cpus_per_task:
-        cmd.append(f"--cpus-per-task={config.slurm_cpus_per_task}")
-    if config.slurm_log_dir is not None:
-        log_subdir = config.slurm_log_dir / row["procedure"]
-        log_subdir.mkdir(parents=True, exist_ok=True)
-        cmd.append(f"--output={log_subdir}/{job_name}_%j.out")
-        cmd.append(f"--error={log_subdir}/{job_name}_%j.err")
-    cmd.append(proc.script)
-    cmd.append(row["subject"])
-    if proc.scope != "subject":
-        cmd.append(row["session"])
-        dicom_path = row.get("dicom_path")
-        if dicom_path is not None and not (isinstance(dicom_path, float) and pd.isna(dicom_path)):
-            cmd.append(str(dicom_path))
+    if isinstance(procedure, Procedure):
+        proc = procedure
+        procedure = proc.name
+    else:
+        proc = config.get_procedure(procedure)
+    cmd = _build_command(
+        proc,
+        subject,
+        session,
+        config,
+        job_name=job_name,
+        dicom_path=dicom_path,
+        create_log_dir=not dry_run,
+        flags=flags,
+    )
 
     if dry_run:
-        logger.info("[DRY RUN] Would submit: %s", " ".join(cmd))
-        print(f"[DRY RUN] Would submit: {' '.join(cmd)}")
+        # Shell-quoted so the previewed command can be pasted verbatim.
+        cmd_str = shlex.join(cmd)
+        logger.info("[DRY RUN] Would submit: %s", cmd_str)
+        print(f"[DRY RUN] Would submit: {cmd_str}")
         if audit is not None:
             audit.log(
                 "dry_run",
-                subject=row["subject"],
-                session=row["session"],
-                procedure=row["procedure"],
+                subject=subject,
+                session=session,
+                procedure=procedure,
                 detail=" ".join(cmd),
+                timestamp=timestamp,
             )
         return None
-    logger.info("Submitting: %s", " ".join(cmd))
-    print(f"Submitting: {' '.join(cmd)}")
+    _announce_submit(cmd)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        # Python fds are non-inheritable by default (PEP 446), so skipping the
+        # close_fds sweep of /proc/self/fd is safe and saves work per sbatch.
+        result = subprocess.run(
+            cmd, capture_output=True, check=True, close_fds=False
+        )
     except subprocess.CalledProcessError as e:
         if audit is not None:
             audit.log(
                 "error",
-                subject=row["subject"],
-                session=row["session"],
-                procedure=row["procedure"],
+                subject=subject,
+                session=session,
+                procedure=procedure,
                 detail=str(e),
+                timestamp=timestamp,
             )
         raise
-    # sbatch stdout: "Submitted batch job 12345"
-    output = result.stdout.strip()
-    if not output.startswith("Submitted batch job "):
-        raise RuntimeError(
-            f"Unexpected sbatch output: {output!r}. "
-            "Expected format: 'Submitted batch job <ID>'"
-        )
-    job_id = output.split()[-1]
+    job_id = _parse_job_id(result.stdout)
     if audit is not None:
         audit.log(
             "submitted",
-            subject=row["subject"],
-            session=row["session"],
-            procedure=row["procedure"],
+            subject=subject,
+            session=session,
+            procedure=procedure,
             job_id=job_id,
+            timestamp=timestamp,
         )
     return job_id
 
 
+def _announce_submit(cmd: list[str]) -> None:
+    """Print and log a live sbatch command, quoting it only if the log is emitted."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Submitting: %s", shlex.join(cmd))
+    print("Submitting:", *cmd)
+
+
 def submit_manifest(
     manifest: pd.DataFrame,
     config: SchedulerConfig,
@@ -141,24 +278,195 @@ def submit_manifest(
 
     Returns a DataFrame of new state rows (one per submitted task) with
     columns: subject, session, procedure, status, submitted_at, job_id.
+    The columns are built the same way for an empty manifest, so
+    ``submitted_at`` is always ``datetime64[ns, UTC]``.
+
+    When ``config.slurm_max_concurrent_submits`` is greater than 1, real
+    submissions run that many sbatch processes at a time on an asyncio event
+    loop; results and audit events keep manifest order. This path uses
+    :func:`asyncio.run` and so cannot be called from inside a running event
+    loop.
+
+    Raises
+    ------
+    SubmissionError
+        If an sbatch call fails. No further tasks are submitted after the
+        failure (in-flight concurrent calls still finish), and the error's
+        ``submitted`` frame holds the rows for the tasks that were.
+    """
+    # One clock read per manifest, kept at the state file's ns resolution;
+    # pd.Timestamp broadcasts into the column without per-row conversion.
+    now = pd.Timestamp(time.time_ns(), tz="UTC")
+    # The audit log keeps the usual microsecond isoformat() timestamps.
+    audit_now = now.floor("us").to_pydatetime()
+
+    # Resolve each distinct procedure once rather than once per row.
+    procs = {name: config.get_procedure(name) for name in manifest["procedure"].unique()}
+    job_names = _build_job_names(manifest, procs)
+    flags = _slurm_flags(config)
+    # Dry runs never yield job IDs, so the column is broadcast from None.
+    job_ids: list[str | None] | None = None
+    error: Exception | None = None
+    with audit.batch() if audit is not None else contextlib.nullcontext():
+        if not dry_run and config.slurm_max_concurrent_submits > 1:
+            job_ids, error = _submit_concurrently(
+                manifest, procs, job_names, config, audit, audit_now, flags
+            )
+        else:
+            if not dry_run:
+                job_ids = [None] * len(manifest)
+            for i, (row, job_name) in enumerate(
+                zip(manifest.itertuples(index=False), job_names)
+            ):
+                try:
+                    job_id = submit_task(
+                        procs[row.procedure],
+                        row.subject,
+                        row.session,
+                        config,
+                        dry_run=dry_run,
+                        audit=audit,
+                        dicom_path=getattr(row, "dicom_path", None),
+                        timestamp=audit_now,
+                        job_name=job_name,
+                        flags=flags,
+                    )
+                except Exception as e:
+                    error = e
+                    break
+                if job_ids is not None:
+                    job_ids[i] = job_id
+
+    new_state = pd.DataFrame({
+        "subject": manifest["subject"].to_numpy(),
+        "session": manifest["session"].to_numpy(),
+        "procedure": manifest["procedure"].to_numpy(),
+        "status": "pending",
+        "submitted_at": now,
+        "job_id": job_ids,
+    })
+    if error is not None:
+        submitted = new_state[new_state["job_id"].notna()].reset_index(drop=True)
+        raise SubmissionError(
+            f"Submission failed after {len(submitted)} of {len(manifest)} "
+            f"task(s): {error}",
+            submitted,
+        ) from error
+    return new_state
+
+
+def _submit_concurrently(
+    manifest: pd.DataFrame,
+    procs: dict[str, Procedure],
+    job_names: list[str],
+    config: SchedulerConfig,
+    audit: AuditLogger | None,
+    timestamp: datetime,
+    flags: tuple[list[str], list[str]],
+) -> tuple[list[str | None], Exception | None]:
+    """Submit every manifest row with bounded sbatch concurrency.
+
+    Once a submission fails no further sbatch process is started; calls
+    already in flight still finish. Outcomes are audited in manifest order.
+    Returns the job IDs (``None`` for rows that failed or were never
+    started) and the first error, if any.
     """
-    new_rows = []
-    now = datetime.now(tz=timezone.utc)
-
-    for _, row in manifest.iterrows():
-        job_id = submit_task(row, config, dry_run=dry_run, audit=audit)
-        new_rows.append({
-            "subject": row["subject"],
-            "session": row["session"],
-            "procedure": row["procedure"],
-            "status": "pending",
-            "submitted_at": now,
-            "job_id": job_id,
-        })
-
-    if not new_rows:
-        return pd.DataFrame(
-            columns=["subject", "session", "procedure", "status", "submitted_at", "job_id"]
+    tasks = []
+    for row, job_name in zip(manifest.itertuples(index=False), job_names):
+        cmd = _build_command(
+            procs[row.procedure],
+            row.subject,
+            row.session,
+            config,
+            job_name=job_name,
+            dicom_path=getattr(row, "dicom_path", None),
+            flags=flags,
         )
+        tasks.append((row, cmd))
+
+    outcomes = asyncio.run(
+        _run_sbatch_all([cmd for _, cmd in tasks], config.slurm_max_concurrent_submits)
+    )
+
+    job_ids: list[str | None] = [None] * len(tasks)
+    first_error: Exception | None = None
+    for i, ((row, _), outcome) in enumerate(zip(tasks, outcomes)):
+        if outcome is None:
+            continue
+        if isinstance(outcome, Exception):
+            if isinstance(outcome, subprocess.CalledProcessError) and audit is not None:
+                audit.log(
+                    "error",
+                    subject=row.subject,
+                    session=row.session,
+                    procedure=row.procedure,
+                    detail=str(outcome),
+                    timestamp=timestamp,
+                )
+            first_error = first_error or outcome
+            continue
+        job_ids[i] = outcome
+        if audit is not None:
+            audit.log(
+                "submitted",
+                subject=row.subject,
+                session=row.session,
+                procedure=row.procedure,
+                job_id=outcome,
+                timestamp=timestamp,
+            )
+    return job_ids, first_error
+
+
+async def _run_sbatch_all(
+    cmds: list[list[str]], max_concurrent: int
+) -> list[str | Exception | None]:
+    """Run *cmds* with at most *max_concurrent* in flight; keep input order.
+
+    Each entry is the job ID, the error raised, or ``None`` when the command
+    was not started because an earlier one had already failed.
+    """
+    limit = asyncio.Semaphore(max_concurrent)
+    failed = asyncio.Event()
+    return await asyncio.gather(
+        *(_submit_sbatch(cmd, limit, failed) for cmd in cmds), return_exceptions=True
+    )
+
 
-    return pd.DataFrame(new_rows)
+async def _submit_sbatch(
+    cmd: list[str], limit: asyncio.Semaphore, failed: asyncio.Event
+) -> str | None:
+    """Run one sbatch command once a slot is free and return its job ID.
+
+    Returns *None* without starting sbatch if *failed* is already set, and
+    sets it when this submission fails.
+    """
+    async with limit:
+        if failed.is_set():
+            return None
+        _announce_submit(cmd)
+        try:
+            return _parse_job_id(await _run_sbatch(cmd))
+        except Exception:
+            failed.set()
+            raise
+
+
+async def _run_sbatch(cmd: list[str]) -> bytes:
+    """Run one sbatch command and return its raw stdout.
+
+    Raises
+    ------
+    subprocess.CalledProcessError
+        If sbatch exits with a non-zero status.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        close_fds=False,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return stdout
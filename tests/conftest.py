@@ -1,38 +1,99 @@
+import os
+import shutil
+
 import pandas as pd
 import pytest
 
-from snbb_scheduler.config import SchedulerConfig
+from snbb_scheduler.config import DEFAULT_PROCEDURES, SchedulerConfig
 
 
 # ---------------------------------------------------------------------------
-# Shared BIDS file creation helper
+# Shared file creation helpers
 # ---------------------------------------------------------------------------
 
+def _touch(path) -> None:
+    """Create an empty file at *path* with a single ``open`` syscall.
+
+    Unlike ``Path.touch`` this never updates the mtime of an existing file;
+    tests only care that the file exists.
+    """
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+def _mkdirs(root, subdirs) -> None:
+    """Create each of *subdirs* (and missing parents) under *root*, once each."""
+    for sub in sorted(set(subdirs)):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+
+def _mkfiles(root, relpaths) -> None:
+    """Create empty files at each of *relpaths* under the existing dir *root*."""
+    for rel in relpaths:
+        _touch(os.path.join(root, rel))
+
+
+# One file per pattern in the BIDS Procedure's completion_marker list
+_BIDS_SESSION_FILES = (
+    "anat/sub_T1w.nii.gz",
+    "dwi/sub_dir-AP_dwi.nii.gz",
+    "dwi/sub_dir-AP_dwi.bvec",
+    "dwi/sub_dir-AP_dwi.bval",
+    # Short reverse-PE DWI lives in dwi/ (bids_post derives the fmap from it)
+    "dwi/sub_dir-PA_dwi.nii.gz",
+    "fmap/sub_acq-func_dir-AP_epi.nii.gz",
+    "fmap/sub_acq-func_dir-PA_epi.nii.gz",
+    "func/sub_task-rest_bold.nii.gz",
+)
+
+
 def _create_bids_session_files(bids_session_dir) -> None:
-    """Create all 8 required BIDS modality files inside *bids_session_dir*.
+    """Create all 8 required BIDS modality files inside *bids_session_dir*."""
+    _mkdirs(bids_session_dir, (os.path.dirname(rel) for rel in _BIDS_SESSION_FILES))
+    _mkfiles(bids_session_dir, _BIDS_SESSION_FILES)
+
+
+def _link_or_copy(src, dst) -> None:
+    """Hard-link *src* to *dst*, copying instead across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
 
-    The filenames are chosen to match the 8 glob patterns in the BIDS
-    Procedure's completion_marker list.
+def _clone_bids(template, dst) -> None:
+    """Recreate the *template* session tree at *dst* with hard-linked files.
+
+    Tests may unlink cloned files, but must not write to them: the data is
+    shared with the template.
     """
-    files = {
-        "anat": ["sub_T1w.nii.gz"],
-        "dwi": [
-            "sub_dir-AP_dwi.nii.gz",
-            "sub_dir-AP_dwi.bvec",
-            "sub_dir-AP_dwi.bval",
-            "sub_dir-PA_dwi.nii.gz",
-        ],
-        "fmap": [
-            "sub_acq-func_dir-AP_epi.nii.gz",
-            "sub_acq-func_dir-PA_epi.nii.gz",
-        ],
-        "func": ["sub_task-rest_bold.nii.gz"],
-    }
-    for subdir, names in files.items():
-        d = bids_session_dir / subdir
-        d.mkdir(parents=True, exist_ok=True)
-        for name in names:
-            (d / name).touch()
+    shutil.copytree(template, dst, copy_function=_link_or_copy)
+
+
+@pytest.fixture(scope="session")
+def _bids_template(tmp_path_factory):
+    """A complete BIDS session tree, built once and cloned by fixtures."""
+    template = tmp_path_factory.mktemp("bids_template")
+    _create_bids_session_files(template)
+    return template
+
+
+# ---------------------------------------------------------------------------
+# State file format
+# ---------------------------------------------------------------------------
+
+# File name for the state file of the config fixtures. With PYTEST_FAST_STATE
+# set they use uncompressed feather, which load_state/save_state pick by suffix.
+_STATE_FILE = "state.feather" if os.environ.get("PYTEST_FAST_STATE") else "state.parquet"
+
+
+# ---------------------------------------------------------------------------
+# Default procedures by name
+# ---------------------------------------------------------------------------
+
+@pytest.fixture(scope="session")
+def procs():
+    """``{name: Procedure}`` for DEFAULT_PROCEDURES, built once per session."""
+    return {p.name: p for p in DEFAULT_PROCEDURES}
 
 
 # ---------------------------------------------------------------------------
@@ -46,7 +107,7 @@ def cfg(tmp_path):
         dicom_root=tmp_path / "dicom",
         bids_root=tmp_path / "bids",
         derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+        state_file=tmp_path / _STATE_FILE,
     )
 
 
@@ -55,7 +116,7 @@ def cfg(tmp_path):
 # ---------------------------------------------------------------------------
 
 @pytest.fixture
-def fake_data_dir(tmp_path):
+def fake_data_dir(tmp_path, _bids_template):
     """Create a minimal fake SNBB directory tree.
 
     Layout:
@@ -65,16 +126,16 @@ def fake_data_dir(tmp_path):
     # DICOM for sub-0001/ses-01
     dicom1 = tmp_path / "dicom" / "sub-0001" / "ses-01"
     dicom1.mkdir(parents=True)
-    (dicom1 / "file.dcm").touch()
+    _touch(dicom1 / "file.dcm")
 
     # BIDS complete for sub-0001/ses-01 — all 8 required modality files
     bids1_root = tmp_path / "bids" / "sub-0001" / "ses-01"
-    _create_bids_session_files(bids1_root)
+    _clone_bids(_bids_template, bids1_root)
 
     # DICOM for sub-0002/ses-01 — no BIDS output
     dicom2 = tmp_path / "dicom" / "sub-0002" / "ses-01"
     dicom2.mkdir(parents=True)
-    (dicom2 / "file.dcm").touch()
+    _touch(dicom2 / "file.dcm")
 
     return tmp_path
 
@@ -86,7 +147,7 @@ def fake_config(fake_data_dir):
         dicom_root=fake_data_dir / "dicom",
         bids_root=fake_data_dir / "bids",
         derivatives_root=fake_data_dir / "derivatives",
-        state_file=fake_data_dir / "state.parquet",
+        state_file=fake_data_dir / _STATE_FILE,
     )
 
 
@@ -117,6 +178,6 @@ def fake_sessions_config(fake_sessions_csv):
         dicom_root=fake_sessions_csv / "dicom",
         bids_root=fake_sessions_csv / "bids",
         derivatives_root=fake_sessions_csv / "derivatives",
-        state_file=fake_sessions_csv / "state.parquet",
+        state_file=fake_sessions_csv / _STATE_FILE,
         sessions_file=fake_sessions_csv / "sessions.csv",
     )
@@ -16,7 +16,8 @@ def log_file(tmp_path):
 
 @pytest.fixture
 def audit(log_file):
-    return AuditLogger(log_file)
+    with AuditLogger(log_file) as a:
+        yield a
 
 
 # ---------------------------------------------------------------------------
@@ -88,12 +89,123 @@ def test_log_creates_parent_directory(tmp_path):
     assert log_file.exists()
 
 
+def test_log_timestamp_is_iso_format(audit, log_file):
+    from datetime import datetime
+    audit.log("submitted")
+    record = json.loads(log_file.read_text())
+    assert datetime.fromisoformat(record["timestamp"]).tzinfo is not None
+
+
+def test_log_uses_given_timestamp(audit, log_file):
+    from datetime import datetime, timezone
+    ts = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    audit.log("submitted", timestamp=ts)
+    record = json.loads(log_file.read_text())
+    assert record["timestamp"] == "2024-01-02T03:04:05+00:00"
+
+
+def test_log_accepts_pandas_timestamp(audit, log_file):
+    import pandas as pd
+    ts = pd.Timestamp("2024-01-02 03:04:05", tz="UTC")
+    audit.log("submitted", timestamp=ts)
+    record = json.loads(log_file.read_text())
+    assert pd.Timestamp(record["timestamp"]) == ts
+
+
+def test_close_releases_handle_and_reopens_on_next_log(audit, log_file):
+    audit.log("submitted", subject="sub-0001")
+    audit.close()
+    audit.close()  # idempotent
+    audit.log("submitted", subject="sub-0002")
+    lines = log_file.read_text().splitlines()
+    assert [json.loads(l)["subject"] for l in lines] == ["sub-0001", "sub-0002"]
+
+
+def test_context_manager_closes_handle(log_file):
+    with AuditLogger(log_file) as a:
+        a.log("submitted")
+    assert a._fh is None
+
+
+def test_log_outside_block_does_not_keep_handle_open(log_file):
+    a = AuditLogger(log_file)
+    a.log("submitted")
+    assert a._fh is None
+    assert log_file.exists()
+
+
+def test_batch_closes_handle_on_exit(log_file):
+    a = AuditLogger(log_file)
+    with a.batch(flush_every=1):
+        a.log("submitted")
+        assert a._fh is not None
+    assert a._fh is None
+
+
+def test_log_without_orjson_falls_back_to_json(audit, log_file, monkeypatch):
+    import snbb_scheduler.audit as audit_mod
+    monkeypatch.setattr(audit_mod, "orjson", None)
+    audit.log("submitted", subject="sub-0001")
+    record = json.loads(log_file.read_text())
+    assert record["subject"] == "sub-0001"
+    assert "T" in record["timestamp"]
+
+
 def test_log_extra_kwargs_in_record(audit, log_file):
     audit.log("submitted", subject="sub-0001", session="ses-01", procedure="bids", extra_key="x")
     record = json.loads(log_file.read_text())
     assert record["extra_key"] == "x"
 
 
+# ---------------------------------------------------------------------------
+# batch()
+# ---------------------------------------------------------------------------
+
+def test_batch_defers_writes_until_exit(audit, log_file):
+    with audit.batch():
+        audit.log("submitted", subject="sub-0001")
+        audit.log("submitted", subject="sub-0002")
+        assert not log_file.exists()
+    lines = log_file.read_text().splitlines()
+    assert [json.loads(l)["subject"] for l in lines] == ["sub-0001", "sub-0002"]
+
+
+def test_batch_flushes_every_n_records(audit, log_file):
+    with audit.batch(flush_every=2):
+        for i in range(3):
+            audit.log("submitted", subject=f"sub-{i}")
+        assert len(log_file.read_text().splitlines()) == 2
+    assert len(log_file.read_text().splitlines()) == 3
+
+
+def test_batch_flushes_on_error(audit, log_file):
+    with pytest.raises(RuntimeError):
+        with audit.batch():
+            audit.log("submitted", subject="sub-0001")
+            raise RuntimeError("boom")
+    assert json.loads(log_file.read_text())["subject"] == "sub-0001"
+
+
+def test_batch_nested_joins_outer(audit, log_file):
+    with audit.batch():
+        with audit.batch():
+            audit.log("submitted")
+        assert not log_file.exists()
+    assert log_file.exists()
+
+
+def test_batch_writes_html_report_once_on_exit(tmp_path):
+    report_dir = tmp_path / "reports"
+    a = AuditLogger(tmp_path / "audit.jsonl", report_dir=report_dir)
+    with a.batch():
+        a.log("submitted", subject="sub-0001")
+        a.log("submitted", subject="sub-0002")
+        assert not (report_dir / "audit_report.html").exists()
+    html = (report_dir / "audit_report.html").read_text()
+    assert "sub-0001" in html and "sub-0002" in html
+    a.close()
+
+
 # ---------------------------------------------------------------------------
 # get_logger
 # ---------------------------------------------------------------------------
@@ -177,6 +289,21 @@ def test_html_report_shows_status_change(tmp_path):
     assert "complete" in html
 
 
+@pytest.mark.parametrize("with_orjson", [True, False], ids=["orjson", "json"])
+def test_html_report_skips_corrupt_lines(tmp_path, monkeypatch, with_orjson):
+    import snbb_scheduler.audit as audit_mod
+    if not with_orjson:
+        monkeypatch.setattr(audit_mod, "orjson", None)
+    log_file = tmp_path / "audit.jsonl"
+    log_file.write_text("{not json\n")
+    report_dir = tmp_path / "reports"
+    a = AuditLogger(log_file, report_dir=report_dir)
+    a.log("submitted", subject="sub-0001", session="ses-01", procedure="bids")
+    html = (report_dir / "audit_report.html").read_text()
+    assert "sub-0001" in html
+    assert "1 event(s)" in html
+
+
 def test_get_logger_passes_report_dir(tmp_path):
     report_dir = tmp_path / "reports"
     cfg = SchedulerConfig(
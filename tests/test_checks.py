@@ -1,13 +1,37 @@
+import fnmatch
+import os
+import re
+from pathlib import Path
+
+import pytest
+import yaml
+
 from snbb_scheduler.checks import (
     FileCheckResult,
+    _StarMatch,
+    _compile_glob,
     _count_available_t1w,
     _count_bids_dwi_sessions,
     _count_recon_all_inputs,
     _count_subject_ses_dirs,
+    _iglob,
     check_detailed,
     is_complete,
 )
 from snbb_scheduler.config import Procedure
+from tests.conftest import _create_bids_session_files, _mkdirs, _mkfiles, _touch
+
+# Guaranteed-absent output path for tests that need no filesystem fixture
+_MISSING = Path("/this/path/must/not/exist/snbb")
+assert not _MISSING.exists()
+
+
+@pytest.fixture
+def root(fs):
+    """Scratch directory on pyfakefs' in-memory filesystem."""
+    path = Path("/scratch")
+    fs.create_dir(path)
+    return path
 
 
 # ---------------------------------------------------------------------------
@@ -15,25 +39,31 @@ from snbb_scheduler.config import Procedure
 # ---------------------------------------------------------------------------
 
 
-def proc_nonempty(name="test"):
-    """completion_marker=None → directory must be non-empty."""
+def _make_proc(name, marker):
+    """Build a Procedure named *name* with the given completion marker."""
     return Procedure(
-        name=name, output_dir=name, script=f"{name}.sh", completion_marker=None
+        name=name, output_dir=name, script=f"{name}.sh", completion_marker=marker
     )
 
 
+def proc_nonempty(name="test"):
+    """completion_marker=None → directory must be non-empty."""
+    return _make_proc(name, None)
+
+
 def proc_marker(name="test", marker="done.txt"):
     """completion_marker is a plain file path."""
-    return Procedure(
-        name=name, output_dir=name, script=f"{name}.sh", completion_marker=marker
-    )
+    return _make_proc(name, marker)
 
 
 def proc_glob(name="test", pattern="**/*.nii.gz"):
     """completion_marker is a glob pattern."""
-    return Procedure(
-        name=name, output_dir=name, script=f"{name}.sh", completion_marker=pattern
-    )
+    return _make_proc(name, pattern)
+
+
+def proc_list(name="test", patterns=("anat/*.nii.gz", "dwi/*.bvec")):
+    """completion_marker is a list of glob patterns."""
+    return _make_proc(name, list(patterns))
 
 
 # ---------------------------------------------------------------------------
@@ -41,16 +71,33 @@ def proc_glob(name="test", pattern="**/*.nii.gz"):
 # ---------------------------------------------------------------------------
 
 
-def test_nonexistent_path_nonempty_strategy(tmp_path):
-    assert is_complete(proc_nonempty(), tmp_path / "missing") is False
+@pytest.mark.parametrize(
+    "factory",
+    [proc_nonempty, proc_marker, proc_glob, proc_list],
+    ids=["nonempty", "marker", "glob", "list"],
+)
+def test_nonexistent_path(factory):
+    assert not is_complete(factory(), _MISSING)
 
 
-def test_nonexistent_path_marker_strategy(tmp_path):
-    assert is_complete(proc_marker(), tmp_path / "missing") is False
+# ---------------------------------------------------------------------------
+# Empty output directory → False for every single-marker strategy
+# ---------------------------------------------------------------------------
 
 
-def test_nonexistent_path_glob_strategy(tmp_path):
-    assert is_complete(proc_glob(), tmp_path / "missing") is False
+@pytest.mark.parametrize(
+    "proc",
+    [
+        proc_nonempty(),
+        proc_marker(marker="scripts/recon-all.done"),
+        proc_glob(pattern="**/*.nii.gz"),
+    ],
+    ids=["nonempty", "marker", "glob"],
+)
+def test_empty_dir(root, proc):
+    d = root / "out"
+    d.mkdir()
+    assert not is_complete(proc, d)
 
 
 # ---------------------------------------------------------------------------
@@ -58,23 +105,17 @@ def test_nonexistent_path_glob_strategy(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_nonempty_strategy_empty_dir(tmp_path):
-    d = tmp_path / "out"
-    d.mkdir()
-    assert is_complete(proc_nonempty(), d) is False
-
-
-def test_nonempty_strategy_populated_dir(tmp_path):
-    d = tmp_path / "out"
+def test_nonempty_strategy_populated_dir(root):
+    d = root / "out"
     d.mkdir()
-    (d / "somefile.txt").touch()
-    assert is_complete(proc_nonempty(), d) is True
+    _touch(d / "somefile.txt")
+    assert is_complete(proc_nonempty(), d)
 
 
-def test_nonempty_strategy_subdir_counts(tmp_path):
-    d = tmp_path / "out"
+def test_nonempty_strategy_subdir_counts(root):
+    d = root / "out"
     (d / "subdir").mkdir(parents=True)
-    assert is_complete(proc_nonempty(), d) is True
+    assert is_complete(proc_nonempty(), d)
 
 
 # ---------------------------------------------------------------------------
@@ -82,24 +123,18 @@ def test_nonempty_strategy_subdir_counts(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_marker_strategy_file_present(tmp_path):
-    d = tmp_path / "out"
+def test_marker_strategy_file_present(root):
+    d = root / "out"
     (d / "scripts").mkdir(parents=True)
-    (d / "scripts" / "recon-all.done").touch()
-    assert is_complete(proc_marker(marker="scripts/recon-all.done"), d) is True
+    _touch(d.joinpath("scripts", "recon-all.done"))
+    assert is_complete(proc_marker(marker="scripts/recon-all.done"), d)
 
 
-def test_marker_strategy_file_absent(tmp_path):
-    d = tmp_path / "out"
+def test_marker_strategy_wrong_file(root):
+    d = root / "out"
     d.mkdir()
-    assert is_complete(proc_marker(marker="scripts/recon-all.done"), d) is False
-
-
-def test_marker_strategy_wrong_file(tmp_path):
-    d = tmp_path / "out"
-    d.mkdir()
-    (d / "other.done").touch()
-    assert is_complete(proc_marker(marker="scripts/recon-all.done"), d) is False
+    _touch(d / "other.done")
+    assert not is_complete(proc_marker(marker="scripts/recon-all.done"), d)
 
 
 # ---------------------------------------------------------------------------
@@ -107,41 +142,28 @@ def test_marker_strategy_wrong_file(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_glob_strategy_match_present(tmp_path):
-    d = tmp_path / "out"
-    anat = d / "anat"
-    anat.mkdir(parents=True)
-    (anat / "T1w.nii.gz").touch()
-    assert is_complete(proc_glob(pattern="**/*.nii.gz"), d) is True
-
-
-def test_glob_strategy_no_match(tmp_path):
-    d = tmp_path / "out"
-    anat = d / "anat"
-    anat.mkdir(parents=True)
-    (anat / "T1w.nii").touch()  # no .gz
-    assert is_complete(proc_glob(pattern="**/*.nii.gz"), d) is False
-
-
-def test_glob_strategy_nested_match(tmp_path):
-    d = tmp_path / "out"
-    deep = d / "sub-0001" / "ses-01" / "dwi"
-    deep.mkdir(parents=True)
-    (deep / "dwi.nii.gz").touch()
-    assert is_complete(proc_glob(pattern="**/*.nii.gz"), d) is True
-
-
-def test_glob_strategy_flat_pattern(tmp_path):
-    d = tmp_path / "out"
-    d.mkdir()
-    (d / "report.html").touch()
-    assert is_complete(proc_glob(pattern="*.html"), d) is True
+def _populate(root, layout):
+    """Create *root* plus the files at the relative paths in *layout*."""
+    for parent in {os.path.dirname(rel) for rel in layout} | {""}:
+        os.makedirs(os.path.join(root, parent), exist_ok=True)
+    _mkfiles(root, layout)
 
 
-def test_glob_strategy_empty_dir(tmp_path):
-    d = tmp_path / "out"
-    d.mkdir()
-    assert is_complete(proc_glob(pattern="**/*.nii.gz"), d) is False
+@pytest.mark.parametrize(
+    "layout, pattern, expected",
+    [
+        (["anat/T1w.nii.gz"], "**/*.nii.gz", True),
+        (["anat/T1w.nii"], "**/*.nii.gz", False),  # no .gz
+        (["sub-0001/ses-01/dwi/dwi.nii.gz"], "**/*.nii.gz", True),
+        (["report.html"], "*.html", True),
+        ([], "**/*.nii.gz", False),
+    ],
+    ids=["match_present", "no_match", "nested_match", "flat_pattern", "empty_dir"],
+)
+def test_glob_strategy(root, layout, pattern, expected):
+    d = root / "out"
+    _populate(d, layout)
+    assert is_complete(proc_glob(pattern=pattern), d) == expected
 
 
 # ---------------------------------------------------------------------------
@@ -149,41 +171,62 @@ def test_glob_strategy_empty_dir(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def proc_list(name="test", patterns=None):
-    """completion_marker is a list of glob patterns."""
-    if patterns is None:
-        patterns = ["anat/*.nii.gz", "dwi/*.bvec"]
-    return Procedure(
-        name=name, output_dir=name, script=f"{name}.sh", completion_marker=patterns
-    )
+def test_list_marker_all_present(root):
+    d = root / "out"
+    _mkdirs(d, ["anat", "dwi"])
+    _mkfiles(d, ["anat/T1w.nii.gz", "dwi/dwi.bvec"])
+    assert is_complete(proc_list(), d)
 
 
-def test_list_marker_all_present(tmp_path):
-    d = tmp_path / "out"
-    (d / "anat").mkdir(parents=True)
-    (d / "anat" / "T1w.nii.gz").touch()
-    (d / "dwi").mkdir()
-    (d / "dwi" / "dwi.bvec").touch()
-    assert is_complete(proc_list(), d) is True
-
-
-def test_list_marker_one_missing(tmp_path):
-    d = tmp_path / "out"
-    (d / "anat").mkdir(parents=True)
-    (d / "anat" / "T1w.nii.gz").touch()
+def test_list_marker_one_missing(root):
+    d = root / "out"
+    _mkdirs(d, ["anat"])
+    _mkfiles(d, ["anat/T1w.nii.gz"])
     # dwi directory not created — second pattern won't match
-    assert is_complete(proc_list(), d) is False
+    assert not is_complete(proc_list(), d)
 
 
-def test_list_marker_empty_list(tmp_path):
+def test_list_marker_empty_list(root):
     """An empty list is vacuously true (all() of nothing is True)."""
-    d = tmp_path / "out"
+    d = root / "out"
     d.mkdir()
-    assert is_complete(proc_list(patterns=[]), d) is True
+    assert is_complete(proc_list(patterns=[]), d)
+
+
+@pytest.mark.parametrize(
+    "files, expected",
+    [
+        (["dwi/a.bvec", "dwi/a.bval", "b.html"], True),
+        (["dwi/a.bvec", "b.html"], False),
+        (["dwi/a.bvec", "dwi/a.bval"], False),
+        (["b.html"], False),
+    ],
+    ids=["all", "missing-in-shared-dir", "missing-top-level", "dir-absent"],
+)
+def test_list_marker_shared_dir_patterns(root, files, expected):
+    """Patterns sharing a directory are all checked against one listing."""
+    d = root / "out"
+    _mkdirs(d, {os.path.dirname(f) for f in files})
+    _mkfiles(d, files)
+    proc = proc_list(patterns=["dwi/*.bvec", "dwi/*.bval", "*.html"])
+    assert is_complete(proc, d) == expected
 
 
-def test_list_marker_nonexistent_path(tmp_path):
-    assert is_complete(proc_list(), tmp_path / "missing") is False
+def test_list_marker_base_is_a_file(root):
+    d = root / "out"
+    d.mkdir()
+    _touch(d / "dwi")
+    assert not is_complete(proc_list(patterns=["dwi/*.bvec"]), d)
+
+
+def test_list_marker_mixes_literal_and_glob(root):
+    d = root / "out"
+    (d / "scripts").mkdir(parents=True)
+    _touch(d.joinpath("scripts", "recon-all.done"))
+    proc = proc_list(patterns=["scripts/recon-all.done", "*.html"])
+    assert not is_complete(proc, d)
+    _touch(d / "report.html")
+    assert is_complete(proc, d)
 
 
 # ---------------------------------------------------------------------------
@@ -191,65 +234,51 @@ def test_list_marker_nonexistent_path(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def _create_bids_session_files(bids_session_dir) -> None:
-    """Create all required BIDS modality files matching the bids completion_marker."""
-    files = {
-        "anat": ["sub_T1w.nii.gz"],
-        "dwi": [
-            "sub_dir-AP_dwi.nii.gz",
-            "sub_dir-AP_dwi.bvec",
-            "sub_dir-AP_dwi.bval",
-            # Short reverse-PE DWI lives in dwi/ (bids_post derives the fmap from it)
-            "sub_dir-PA_dwi.nii.gz",
-        ],
-        "fmap": [
-            "sub_acq-func_dir-AP_epi.nii.gz",
-            "sub_acq-func_dir-PA_epi.nii.gz",
-        ],
-        "func": ["sub_task-rest_bold.nii.gz"],
-    }
-    for subdir, names in files.items():
-        d = bids_session_dir / subdir
-        d.mkdir(parents=True, exist_ok=True)
-        for name in names:
-            (d / name).touch()
-
-
-def test_bids_complete_all_patterns_present(tmp_path):
-    """bids is complete when all 8 modality patterns are satisfied."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    bids = next(p for p in DEFAULT_PROCEDURES if p.name == "bids")
-
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
-    _create_bids_session_files(bids_session)
-
-    assert is_complete(bids, bids_session) is True
+@pytest.fixture
+def bids_session_complete(root):
+    """BIDS session directory satisfying all 8 bids completion patterns."""
+    session = root.joinpath("bids", "sub-0001", "ses-01")
+    _create_bids_session_files(session)
+    return session
 
 
-def test_bids_incomplete_missing_one_pattern(tmp_path):
-    """bids is incomplete when any one of the 8 patterns is missing."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
+@pytest.fixture
+def bids_session_missing_func(bids_session_complete):
+    """BIDS session whose modality dirs link to the complete tree, minus func/.
 
-    bids = next(p for p in DEFAULT_PROCEDURES if p.name == "bids")
-
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
-    _create_bids_session_files(bids_session)
-    # Remove the func file to make one pattern fail
-    (bids_session / "func" / "sub_task-rest_bold.nii.gz").unlink()
-
-    assert is_complete(bids, bids_session) is False
+    Only an empty ``func/`` directory is created for real.
+    """
+    session = bids_session_complete.parents[1].joinpath("sub-0002", "ses-01")
+    session.mkdir(parents=True)
+    for subdir in ("anat", "dwi", "fmap"):
+        os.symlink(bids_session_complete / subdir, session / subdir)
+    (session / "func").mkdir()
+    return session
+
+
+@pytest.mark.parametrize(
+    "session_fixture, expected",
+    [
+        # complete when all 8 modality patterns are satisfied
+        ("bids_session_complete", True),
+        # incomplete when any one of the 8 patterns is missing
+        ("bids_session_missing_func", False),
+    ],
+)
+def test_bids_completion_patterns(request, session_fixture, expected, procs):
+    bids = procs["bids"]
+    bids_session = request.getfixturevalue(session_fixture)
 
+    assert is_complete(bids, bids_session) == expected
 
-def test_bids_incomplete_no_files(tmp_path):
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
 
-    bids = next(p for p in DEFAULT_PROCEDURES if p.name == "bids")
+def test_bids_incomplete_no_files(root, procs):
+    bids = procs["bids"]
 
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
+    bids_session = root.joinpath("bids", "sub-0001", "ses-01")
     bids_session.mkdir(parents=True)  # dir exists but empty
 
-    assert is_complete(bids, bids_session) is False
+    assert not is_complete(bids, bids_session)
 
 
 def _write_recon_all_done(scripts_dir, subject, n_t1w, success=True):
@@ -276,27 +305,23 @@ def _write_recon_all_done(scripts_dir, subject, n_t1w, success=True):
 # ---------------------------------------------------------------------------
 
 
-def test_freesurfer_complete_with_marker_no_kwargs(tmp_path):
+def test_freesurfer_complete_with_marker_no_kwargs(root, procs):
     """Without bids_root/subject kwargs the fallback is: done file exists → True."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    fs = next(p for p in DEFAULT_PROCEDURES if p.name == "freesurfer")
+    fs = procs["freesurfer"]
 
-    fs_subject = tmp_path / "freesurfer" / "sub-0001"
+    fs_subject = root.joinpath("freesurfer", "sub-0001")
     _write_recon_all_done(fs_subject / "scripts", "sub-0001", n_t1w=1)
 
-    assert is_complete(fs, fs_subject) is True
-
+    assert is_complete(fs, fs_subject)
 
-def test_freesurfer_incomplete_no_marker(tmp_path):
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
 
-    fs = next(p for p in DEFAULT_PROCEDURES if p.name == "freesurfer")
+def test_freesurfer_incomplete_no_marker(root, procs):
+    fs = procs["freesurfer"]
 
-    fs_subject = tmp_path / "freesurfer" / "sub-0001"
+    fs_subject = root.joinpath("freesurfer", "sub-0001")
     fs_subject.mkdir(parents=True)  # dir exists but no done file
 
-    assert is_complete(fs, fs_subject) is False
+    assert not is_complete(fs, fs_subject)
 
 
 # ---------------------------------------------------------------------------
@@ -304,22 +329,16 @@ def test_freesurfer_incomplete_no_marker(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def _get_freesurfer_proc():
-    """Retrieve the freesurfer Procedure from DEFAULT_PROCEDURES."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-    return next(p for p in DEFAULT_PROCEDURES if p.name == "freesurfer")
-
-
 def _make_bids_t1w(bids_root, subject, session):
     """Create a minimal BIDS T1w NIfTI so _count_bids_anat_sessions finds the session."""
-    anat = bids_root / subject / session / "anat"
+    anat = bids_root.joinpath(subject, session, "anat")
     anat.mkdir(parents=True, exist_ok=True)
-    (anat / f"{subject}_{session}_T1w.nii.gz").touch()
+    _touch(anat / f"{subject}_{session}_T1w.nii.gz")
 
 
 def _touch_done(subjects_dir, subject_id):
     """Create scripts/recon-all.done for a FreeSurfer subject ID."""
-    scripts = subjects_dir / subject_id / "scripts"
+    scripts = subjects_dir.joinpath(subject_id, "scripts")
     scripts.mkdir(parents=True, exist_ok=True)
     (scripts / "recon-all.done").write_text(
         f"------------------------------\nSUBJECT {subject_id}\n"
@@ -329,54 +348,54 @@ def _touch_done(subjects_dir, subject_id):
 # ── single-session (cross-sectional only) ─────────────────────────────────────
 
 
-def test_freesurfer_single_session_complete(tmp_path):
+def test_freesurfer_single_session_complete(root, procs):
     """Single-session: check <output_path>/scripts/recon-all.done."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject, session = "sub-0001", "ses-01"
-    bids_root = tmp_path / "bids"
-    subjects_dir = tmp_path / "derivatives" / "freesurfer"
+    bids_root = root / "bids"
+    subjects_dir = root.joinpath("derivatives", "freesurfer")
 
     _make_bids_t1w(bids_root, subject, session)
     # output at <subject>/ (cross-sectional naming for single session)
     output_path = subjects_dir / subject
     _touch_done(subjects_dir, subject)
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is True
+    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_single_session_incomplete_no_done(tmp_path):
+def test_freesurfer_single_session_incomplete_no_done(root, procs):
     """Single-session: returns False when recon-all.done is absent."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject, session = "sub-0001", "ses-01"
-    bids_root = tmp_path / "bids"
-    subjects_dir = tmp_path / "derivatives" / "freesurfer"
+    bids_root = root / "bids"
+    subjects_dir = root.joinpath("derivatives", "freesurfer")
 
     _make_bids_t1w(bids_root, subject, session)
     output_path = subjects_dir / subject
     output_path.mkdir(parents=True)  # dir exists but no done file
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_single_session_incomplete_dir_absent(tmp_path):
+def test_freesurfer_single_session_incomplete_dir_absent(root, procs):
     """Single-session: returns False when the subject directory does not exist."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject, session = "sub-0001", "ses-01"
-    bids_root = tmp_path / "bids"
+    bids_root = root / "bids"
 
     _make_bids_t1w(bids_root, subject, session)
-    output_path = tmp_path / "derivatives" / "freesurfer" / subject
+    output_path = root.joinpath("derivatives", "freesurfer", subject)
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
 # ── multi-session (longitudinal: cross + template + long) ─────────────────────
 
 
-def _setup_multi_session_complete(tmp_path, subject, sessions):
+def _setup_multi_session_complete(root, subject, sessions):
     """Create all done files needed for a complete longitudinal FreeSurfer run."""
-    bids_root = tmp_path / "bids"
-    subjects_dir = tmp_path / "derivatives" / "freesurfer"
+    bids_root = root / "bids"
+    subjects_dir = root.joinpath("derivatives", "freesurfer")
 
     for ses in sessions:
         _make_bids_t1w(bids_root, subject, ses)
@@ -393,96 +412,96 @@ def _setup_multi_session_complete(tmp_path, subject, sessions):
     return bids_root, subjects_dir / subject
 
 
-def test_freesurfer_multi_session_complete(tmp_path):
+def test_freesurfer_multi_session_complete(root, procs):
     """Multi-session: complete when cross, template, and longitudinal done files all exist."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
     sessions = ["ses-01", "ses-02"]
 
-    bids_root, output_path = _setup_multi_session_complete(tmp_path, subject, sessions)
+    bids_root, output_path = _setup_multi_session_complete(root, subject, sessions)
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is True
+    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_multi_session_incomplete_cross_missing(tmp_path):
+def test_freesurfer_multi_session_incomplete_cross_missing(root, procs):
     """Multi-session: returns False when a cross-sectional done file is absent."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
     sessions = ["ses-01", "ses-02"]
 
-    bids_root, output_path = _setup_multi_session_complete(tmp_path, subject, sessions)
+    bids_root, output_path = _setup_multi_session_complete(root, subject, sessions)
 
     # Remove one cross-sectional done file
     subjects_dir = output_path.parent
-    (subjects_dir / f"{subject}_ses-02" / "scripts" / "recon-all.done").unlink()
+    subjects_dir.joinpath(f"{subject}_ses-02", "scripts", "recon-all.done").unlink()
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_multi_session_incomplete_template_missing(tmp_path):
+def test_freesurfer_multi_session_incomplete_template_missing(root, procs):
     """Multi-session: returns False when the template done file is absent."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
     sessions = ["ses-01", "ses-02"]
 
-    bids_root, output_path = _setup_multi_session_complete(tmp_path, subject, sessions)
+    bids_root, output_path = _setup_multi_session_complete(root, subject, sessions)
 
     # Remove the template done file
-    (output_path / "scripts" / "recon-all.done").unlink()
+    output_path.joinpath("scripts", "recon-all.done").unlink()
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_multi_session_incomplete_long_missing(tmp_path):
+def test_freesurfer_multi_session_incomplete_long_missing(root, procs):
     """Multi-session: returns False when a longitudinal done file is absent."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
     sessions = ["ses-01", "ses-02"]
 
-    bids_root, output_path = _setup_multi_session_complete(tmp_path, subject, sessions)
+    bids_root, output_path = _setup_multi_session_complete(root, subject, sessions)
 
     # Remove one longitudinal done file
     subjects_dir = output_path.parent
-    (subjects_dir / f"{subject}_ses-01.long.{subject}" / "scripts" / "recon-all.done").unlink()
+    subjects_dir.joinpath(f"{subject}_ses-01.long.{subject}", "scripts", "recon-all.done").unlink()
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_multi_session_three_sessions_complete(tmp_path):
+def test_freesurfer_multi_session_three_sessions_complete(root, procs):
     """Multi-session: works correctly with three sessions."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
     sessions = ["ses-01", "ses-02", "ses-03"]
 
-    bids_root, output_path = _setup_multi_session_complete(tmp_path, subject, sessions)
+    bids_root, output_path = _setup_multi_session_complete(root, subject, sessions)
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is True
+    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
 # ── no BIDS sessions / fallback ───────────────────────────────────────────────
 
 
-def test_freesurfer_no_bids_sessions_returns_false(tmp_path):
+def test_freesurfer_no_bids_sessions_returns_false(root, procs):
     """Returns False when no T1w sessions are found in BIDS."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject = "sub-0001"
-    bids_root = tmp_path / "bids"
+    bids_root = root / "bids"
 
-    output_path = tmp_path / "derivatives" / "freesurfer" / subject
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    output_path = root.joinpath("derivatives", "freesurfer", subject)
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
-def test_freesurfer_incomplete_no_done_file_with_kwargs(tmp_path):
+def test_freesurfer_incomplete_no_done_file_with_kwargs(root, procs):
     """Done file missing → incomplete even with kwargs provided (single session)."""
-    proc = _get_freesurfer_proc()
+    proc = procs["freesurfer"]
     subject, session = "sub-0001", "ses-01"
-    bids_root = tmp_path / "bids"
+    bids_root = root / "bids"
 
     _make_bids_t1w(bids_root, subject, session)
-    output_path = tmp_path / "derivatives" / "freesurfer" / subject
+    output_path = root.joinpath("derivatives", "freesurfer", subject)
     output_path.mkdir(parents=True)  # dir exists but no done file
 
-    assert is_complete(proc, output_path, bids_root=bids_root, subject=subject) is False
+    assert not is_complete(proc, output_path, bids_root=bids_root, subject=subject)
 
 
 # ---------------------------------------------------------------------------
@@ -490,22 +509,22 @@ def test_freesurfer_incomplete_no_done_file_with_kwargs(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_count_recon_all_inputs_one_flag(tmp_path):
-    done = tmp_path / "recon-all.done"
+def test_count_recon_all_inputs_one_flag(root):
+    done = root / "recon-all.done"
     done.write_text("#CMDARGS -subject sub-0001 -all -i /data/T1w.nii.gz\n")
     assert _count_recon_all_inputs(done) == 1
 
 
-def test_count_recon_all_inputs_multiple_flags(tmp_path):
-    done = tmp_path / "recon-all.done"
+def test_count_recon_all_inputs_multiple_flags(root):
+    done = root / "recon-all.done"
     done.write_text(
         "#CMDARGS -subject sub-0001 -all -i /data/ses-01/T1w.nii.gz -i /data/ses-02/T1w.nii.gz\n"
     )
     assert _count_recon_all_inputs(done) == 2
 
 
-def test_count_recon_all_inputs_no_cmdargs_line(tmp_path):
-    done = tmp_path / "recon-all.done"
+def test_count_recon_all_inputs_no_cmdargs_line(root):
+    done = root / "recon-all.done"
     done.write_text("some other content\n")
     assert _count_recon_all_inputs(done) == 0
 
@@ -515,36 +534,40 @@ def test_count_recon_all_inputs_no_cmdargs_line(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_count_available_t1w_two_sessions(tmp_path):
+def test_count_available_t1w_two_sessions(root):
     subject = "sub-0001"
     for ses in ("ses-01", "ses-02"):
-        anat = tmp_path / subject / ses / "anat"
+        anat = root.joinpath(subject, ses, "anat")
         anat.mkdir(parents=True)
-        (anat / f"{subject}_{ses}_T1w.nii.gz").touch()
-    assert _count_available_t1w(tmp_path, subject) == 2
+        _touch(anat / f"{subject}_{ses}_T1w.nii.gz")
+    assert _count_available_t1w(root, subject) == 2
 
 
-def test_count_available_t1w_subject_missing(tmp_path):
-    assert _count_available_t1w(tmp_path, "sub-9999") == 0
+def test_count_available_t1w_subject_missing(root):
+    assert _count_available_t1w(root, "sub-9999") == 0
 
 
-def test_count_available_t1w_excludes_defaced(tmp_path):
+def test_count_available_t1w_excludes_defaced(root):
     subject = "sub-0001"
-    anat = tmp_path / subject / "ses-01" / "anat"
+    anat = root.joinpath(subject, "ses-01", "anat")
     anat.mkdir(parents=True)
-    (anat / f"{subject}_ses-01_T1w.nii.gz").touch()
-    (anat / f"{subject}_ses-01_acq-defaced_T1w.nii.gz").touch()
-    assert _count_available_t1w(tmp_path, subject) == 1
+    _mkfiles(anat, [
+        f"{subject}_ses-01_T1w.nii.gz",
+        f"{subject}_ses-01_acq-defaced_T1w.nii.gz",
+    ])
+    assert _count_available_t1w(root, subject) == 1
 
 
-def test_count_available_t1w_prefers_rec_norm(tmp_path):
+def test_count_available_t1w_prefers_rec_norm(root):
     """When rec-norm variants exist, only those count."""
     subject = "sub-0001"
-    anat = tmp_path / subject / "ses-01" / "anat"
+    anat = root.joinpath(subject, "ses-01", "anat")
     anat.mkdir(parents=True)
-    (anat / f"{subject}_ses-01_T1w.nii.gz").touch()
-    (anat / f"{subject}_ses-01_rec-norm_T1w.nii.gz").touch()
-    assert _count_available_t1w(tmp_path, subject) == 1
+    _mkfiles(anat, [
+        f"{subject}_ses-01_T1w.nii.gz",
+        f"{subject}_ses-01_rec-norm_T1w.nii.gz",
+    ])
+    assert _count_available_t1w(root, subject) == 1
 
 
 # ---------------------------------------------------------------------------
@@ -552,15 +575,32 @@ def test_count_available_t1w_prefers_rec_norm(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_count_subject_ses_dirs_two_sessions(tmp_path):
-    subject_dir = tmp_path / "sub-0001"
+def test_count_subject_ses_dirs_two_sessions(root):
+    subject_dir = root / "sub-0001"
     (subject_dir / "ses-01").mkdir(parents=True)
     (subject_dir / "ses-02").mkdir()
     assert _count_subject_ses_dirs(subject_dir) == 2
 
 
-def test_count_subject_ses_dirs_missing_dir(tmp_path):
-    assert _count_subject_ses_dirs(tmp_path / "nonexistent") == 0
+def test_count_subject_ses_dirs_missing_dir(root):
+    assert _count_subject_ses_dirs(root / "nonexistent") == 0
+
+
+def test_count_subject_ses_dirs_ignores_files_and_other_dirs(root):
+    subject_dir = root / "sub-0001"
+    (subject_dir / "ses-01").mkdir(parents=True)
+    (subject_dir / "figures").mkdir()
+    _touch(subject_dir / "ses-02.html")
+    assert _count_subject_ses_dirs(subject_dir) == 1
+
+
+def test_count_subject_ses_dirs_sees_new_sessions(root):
+    subject_dir = root / "sub-0001"
+    (subject_dir / "ses-01").mkdir(parents=True)
+    assert _count_subject_ses_dirs(subject_dir) == 1
+
+    (subject_dir / "ses-02").mkdir()
+    assert _count_subject_ses_dirs(subject_dir) == 2
 
 
 # ---------------------------------------------------------------------------
@@ -568,17 +608,17 @@ def test_count_subject_ses_dirs_missing_dir(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_count_bids_dwi_sessions_two_sessions(tmp_path):
+def test_count_bids_dwi_sessions_two_sessions(root):
     subject = "sub-0001"
     for ses in ("ses-01", "ses-02"):
-        dwi = tmp_path / subject / ses / "dwi"
+        dwi = root.joinpath(subject, ses, "dwi")
         dwi.mkdir(parents=True)
-        (dwi / f"{subject}_{ses}_dir-AP_dwi.nii.gz").touch()
-    assert _count_bids_dwi_sessions(tmp_path, subject) == 2
+        _touch(dwi / f"{subject}_{ses}_dir-AP_dwi.nii.gz")
+    assert _count_bids_dwi_sessions(root, subject) == 2
 
 
-def test_count_bids_dwi_sessions_subject_missing(tmp_path):
-    assert _count_bids_dwi_sessions(tmp_path, "sub-9999") == 0
+def test_count_bids_dwi_sessions_subject_missing(root):
+    assert _count_bids_dwi_sessions(root, "sub-9999") == 0
 
 
 # ---------------------------------------------------------------------------
@@ -589,55 +629,51 @@ def test_count_bids_dwi_sessions_subject_missing(tmp_path):
 def _create_qsiprep_session_files(session_dir, subject, session):
     """Create all expected QSIPrep session-level output files."""
     session_dir.mkdir(parents=True, exist_ok=True)
-    (session_dir / f"{subject}_{session}.html").touch()
+    _touch(session_dir / f"{subject}_{session}.html")
     dwi = session_dir / "dwi"
     dwi.mkdir(exist_ok=True)
     stem = f"{subject}_{session}_dwi_preproc"
-    (dwi / f"{stem}.nii.gz").touch()
-    (dwi / f"{stem}.bvec").touch()
-    (dwi / f"{stem}.bval").touch()
-    (dwi / f"{subject}_{session}_desc-image_qc.tsv").touch()
+    _mkfiles(dwi, [
+        f"{stem}.nii.gz",
+        f"{stem}.bvec",
+        f"{stem}.bval",
+        f"{subject}_{session}_desc-image_qc.tsv",
+    ])
 
 
-def test_qsiprep_complete_with_html_and_dwi(tmp_path):
+def test_qsiprep_complete_with_html_and_dwi(root, procs):
     """QSIPrep complete when HTML + all DWI preproc files present at session level."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsiprep = next(p for p in DEFAULT_PROCEDURES if p.name == "qsiprep")
+    qsiprep = procs["qsiprep"]
 
     subject, session = "sub-0001", "ses-01"
-    session_dir = tmp_path / "derivatives" / "qsiprep" / subject / session
+    session_dir = root.joinpath("derivatives", "qsiprep", subject, session)
     _create_qsiprep_session_files(session_dir, subject, session)
 
-    assert is_complete(qsiprep, session_dir) is True
+    assert is_complete(qsiprep, session_dir)
 
 
-def test_qsiprep_incomplete_missing_html(tmp_path):
+def test_qsiprep_incomplete_missing_html(root, procs):
     """QSIPrep incomplete when HTML report is absent even if DWI files exist."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsiprep = next(p for p in DEFAULT_PROCEDURES if p.name == "qsiprep")
+    qsiprep = procs["qsiprep"]
 
     subject, session = "sub-0001", "ses-01"
-    session_dir = tmp_path / "derivatives" / "qsiprep" / subject / session
+    session_dir = root.joinpath("derivatives", "qsiprep", subject, session)
     _create_qsiprep_session_files(session_dir, subject, session)
     (session_dir / f"{subject}_{session}.html").unlink()
 
-    assert is_complete(qsiprep, session_dir) is False
+    assert not is_complete(qsiprep, session_dir)
 
 
-def test_qsiprep_incomplete_missing_dwi_file(tmp_path):
+def test_qsiprep_incomplete_missing_dwi_file(root, procs):
     """QSIPrep incomplete when one DWI preproc file is absent."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsiprep = next(p for p in DEFAULT_PROCEDURES if p.name == "qsiprep")
+    qsiprep = procs["qsiprep"]
 
     subject, session = "sub-0001", "ses-01"
-    session_dir = tmp_path / "derivatives" / "qsiprep" / subject / session
+    session_dir = root.joinpath("derivatives", "qsiprep", subject, session)
     _create_qsiprep_session_files(session_dir, subject, session)
-    (session_dir / "dwi" / f"{subject}_{session}_dwi_preproc.bval").unlink()
+    session_dir.joinpath("dwi", f"{subject}_{session}_dwi_preproc.bval").unlink()
 
-    assert is_complete(qsiprep, session_dir) is False
+    assert not is_complete(qsiprep, session_dir)
 
 
 # ---------------------------------------------------------------------------
@@ -645,70 +681,58 @@ def test_qsiprep_incomplete_missing_dwi_file(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_qsirecon_complete_wildcard_fallback(tmp_path):
+def test_qsirecon_complete_wildcard_fallback(root, procs):
     """QSIRecon complete via wildcard when no recon_spec given but HTML exists."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
     subject, session = "sub-0001", "ses-01"
-    derivatives_root = tmp_path / "derivatives"
+    derivatives_root = root / "derivatives"
 
-    pipeline_dir = derivatives_root / "qsirecon" / "derivatives" / "qsirecon-MRtrix3_act-HSVS"
+    pipeline_dir = derivatives_root.joinpath("qsirecon", "derivatives", "qsirecon-MRtrix3_act-HSVS")
     pipeline_dir.mkdir(parents=True)
-    (pipeline_dir / f"{subject}_{session}.html").touch()
-
-    qsirecon_subject = derivatives_root / "qsirecon" / subject
-    assert (
-        is_complete(
-            qsirecon,
-            qsirecon_subject,
-            derivatives_root=derivatives_root,
-            subject=subject,
-            session=session,
-        )
-        is True
+    _touch(pipeline_dir / f"{subject}_{session}.html")
+
+    qsirecon_subject = derivatives_root.joinpath("qsirecon", subject)
+    assert is_complete(
+        qsirecon,
+        qsirecon_subject,
+        derivatives_root=derivatives_root,
+        subject=subject,
+        session=session,
     )
 
 
-def test_qsirecon_incomplete_missing_session_html(tmp_path):
+def test_qsirecon_incomplete_missing_session_html(root, procs):
     """QSIRecon incomplete when HTML report is absent for the requested session."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
     subject, session = "sub-0001", "ses-02"
-    derivatives_root = tmp_path / "derivatives"
+    derivatives_root = root / "derivatives"
 
     # Only ses-01 HTML created; ses-02 missing
-    pipeline_dir = derivatives_root / "qsirecon" / "derivatives" / "qsirecon-MRtrix3_act-HSVS"
+    pipeline_dir = derivatives_root.joinpath("qsirecon", "derivatives", "qsirecon-MRtrix3_act-HSVS")
     pipeline_dir.mkdir(parents=True)
-    (pipeline_dir / f"{subject}_ses-01.html").touch()
-
-    qsirecon_subject = derivatives_root / "qsirecon" / subject
-    assert (
-        is_complete(
-            qsirecon,
-            qsirecon_subject,
-            derivatives_root=derivatives_root,
-            subject=subject,
-            session=session,
-        )
-        is False
+    _touch(pipeline_dir / f"{subject}_ses-01.html")
+
+    qsirecon_subject = derivatives_root.joinpath("qsirecon", subject)
+    assert not is_complete(
+        qsirecon,
+        qsirecon_subject,
+        derivatives_root=derivatives_root,
+        subject=subject,
+        session=session,
     )
 
 
-def test_qsirecon_fallback_nonempty(tmp_path):
+def test_qsirecon_fallback_nonempty(root, procs):
     """Without kwargs, qsirecon falls back to dir-nonempty check."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
-    subject_dir = tmp_path / "qsirecon" / "sub-0001"
+    subject_dir = root.joinpath("qsirecon", "sub-0001")
     subject_dir.mkdir(parents=True)
-    (subject_dir / "something.txt").touch()
+    _touch(subject_dir / "something.txt")
 
-    assert is_complete(qsirecon, subject_dir) is True
+    assert is_complete(qsirecon, subject_dir)
 
 
 # ---------------------------------------------------------------------------
@@ -716,53 +740,45 @@ def test_qsirecon_fallback_nonempty(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_defacing_complete_when_acq_defaced_present(tmp_path):
+def test_defacing_complete_when_acq_defaced_present(root, procs):
     """Defacing complete when anat/*acq-defaced*_T1w.nii.gz exists."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
+    defacing = procs["defacing"]
 
-    defacing = next(p for p in DEFAULT_PROCEDURES if p.name == "defacing")
-
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
+    bids_session = root.joinpath("bids", "sub-0001", "ses-01")
     anat = bids_session / "anat"
     anat.mkdir(parents=True)
-    (anat / "sub-0001_ses-01_acq-defaced_T1w.nii.gz").touch()
+    _touch(anat / "sub-0001_ses-01_acq-defaced_T1w.nii.gz")
 
-    assert is_complete(defacing, bids_session) is True
+    assert is_complete(defacing, bids_session)
 
 
-def test_defacing_incomplete_when_no_acq_defaced(tmp_path):
+def test_defacing_incomplete_when_no_acq_defaced(root, procs):
     """Defacing incomplete when only the original (non-defaced) T1w exists."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    defacing = next(p for p in DEFAULT_PROCEDURES if p.name == "defacing")
+    defacing = procs["defacing"]
 
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
+    bids_session = root.joinpath("bids", "sub-0001", "ses-01")
     anat = bids_session / "anat"
     anat.mkdir(parents=True)
-    (anat / "sub-0001_ses-01_T1w.nii.gz").touch()  # no acq-defaced entity
+    _touch(anat / "sub-0001_ses-01_T1w.nii.gz")  # no acq-defaced entity
 
-    assert is_complete(defacing, bids_session) is False
+    assert not is_complete(defacing, bids_session)
 
 
-def test_defacing_incomplete_when_no_anat_dir(tmp_path):
+def test_defacing_incomplete_when_no_anat_dir(root, procs):
     """Defacing incomplete when the anat directory does not exist."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    defacing = next(p for p in DEFAULT_PROCEDURES if p.name == "defacing")
+    defacing = procs["defacing"]
 
-    bids_session = tmp_path / "bids" / "sub-0001" / "ses-01"
+    bids_session = root.joinpath("bids", "sub-0001", "ses-01")
     bids_session.mkdir(parents=True)  # session dir exists but no anat subdir
 
-    assert is_complete(defacing, bids_session) is False
+    assert not is_complete(defacing, bids_session)
 
 
-def test_defacing_incomplete_when_session_dir_missing(tmp_path):
+def test_defacing_incomplete_when_session_dir_missing(root, procs):
     """Defacing incomplete when the session directory itself does not exist."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
+    defacing = procs["defacing"]
 
-    defacing = next(p for p in DEFAULT_PROCEDURES if p.name == "defacing")
-
-    assert is_complete(defacing, tmp_path / "bids" / "sub-0001" / "ses-01") is False
+    assert not is_complete(defacing, root.joinpath("bids", "sub-0001", "ses-01"))
 
 
 
@@ -772,103 +788,85 @@ def test_defacing_incomplete_when_session_dir_missing(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_qsirecon_complete_with_recon_spec(tmp_path):
+def test_qsirecon_complete_with_recon_spec(root, procs):
     """QSIRecon complete when HTML exists for every suffix in the spec."""
-    import yaml as _yaml
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
     subject, session = "sub-0001", "ses-01"
-    derivatives_root = tmp_path / "derivatives"
+    derivatives_root = root / "derivatives"
     suffixes = ["DIPYDKI", "MRtrix3_act-HSVS"]
 
-    spec = tmp_path / "spec.yaml"
-    spec.write_text(_yaml.dump({"nodes": [{"qsirecon_suffix": s} for s in suffixes]}))
+    spec = root / "spec.yaml"
+    spec.write_text(yaml.dump({"nodes": [{"qsirecon_suffix": s} for s in suffixes]}))
 
     qsirecon_root = derivatives_root / "qsirecon"
     for s in suffixes:
-        d = qsirecon_root / "derivatives" / f"qsirecon-{s}"
+        d = qsirecon_root.joinpath("derivatives", f"qsirecon-{s}")
         d.mkdir(parents=True)
-        (d / f"{subject}_{session}.html").touch()
+        _touch(d / f"{subject}_{session}.html")
 
     qsirecon_subject = qsirecon_root / subject
-    assert (
-        is_complete(
-            qsirecon,
-            qsirecon_subject,
-            derivatives_root=derivatives_root,
-            subject=subject,
-            session=session,
-            recon_spec=spec,
-        )
-        is True
+    assert is_complete(
+        qsirecon,
+        qsirecon_subject,
+        derivatives_root=derivatives_root,
+        subject=subject,
+        session=session,
+        recon_spec=spec,
     )
 
 
-def test_qsirecon_incomplete_missing_one_suffix_html(tmp_path):
+def test_qsirecon_incomplete_missing_one_suffix_html(root, procs):
     """QSIRecon incomplete when one suffix HTML is absent."""
-    import yaml as _yaml
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
     subject, session = "sub-0001", "ses-01"
-    derivatives_root = tmp_path / "derivatives"
+    derivatives_root = root / "derivatives"
     suffixes = ["DIPYDKI", "MRtrix3_act-HSVS"]
 
-    spec = tmp_path / "spec.yaml"
-    spec.write_text(_yaml.dump({"nodes": [{"qsirecon_suffix": s} for s in suffixes]}))
+    spec = root / "spec.yaml"
+    spec.write_text(yaml.dump({"nodes": [{"qsirecon_suffix": s} for s in suffixes]}))
 
     # Only create HTML for the first suffix; second is missing
     qsirecon_root = derivatives_root / "qsirecon"
-    d = qsirecon_root / "derivatives" / f"qsirecon-{suffixes[0]}"
+    d = qsirecon_root.joinpath("derivatives", f"qsirecon-{suffixes[0]}")
     d.mkdir(parents=True)
-    (d / f"{subject}_{session}.html").touch()
+    _touch(d / f"{subject}_{session}.html")
 
     qsirecon_subject = qsirecon_root / subject
-    assert (
-        is_complete(
-            qsirecon,
-            qsirecon_subject,
-            derivatives_root=derivatives_root,
-            subject=subject,
-            session=session,
-            recon_spec=spec,
-        )
-        is False
+    assert not is_complete(
+        qsirecon,
+        qsirecon_subject,
+        derivatives_root=derivatives_root,
+        subject=subject,
+        session=session,
+        recon_spec=spec,
     )
 
 
-def test_qsirecon_recon_spec_empty_falls_back_to_wildcard(tmp_path):
+def test_qsirecon_recon_spec_empty_falls_back_to_wildcard(root, procs):
     """When spec has no qsirecon_suffix nodes, falls back to wildcard HTML check."""
-    import yaml as _yaml
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsirecon = next(p for p in DEFAULT_PROCEDURES if p.name == "qsirecon")
+    qsirecon = procs["qsirecon"]
 
     subject, session = "sub-0001", "ses-01"
-    derivatives_root = tmp_path / "derivatives"
+    derivatives_root = root / "derivatives"
 
-    spec = tmp_path / "spec.yaml"
-    spec.write_text(_yaml.dump({"nodes": [{"action": "some_action"}]}))  # no suffixes
+    spec = root / "spec.yaml"
+    spec.write_text(yaml.dump({"nodes": [{"action": "some_action"}]}))  # no suffixes
 
     qsirecon_root = derivatives_root / "qsirecon"
-    d = qsirecon_root / "derivatives" / "qsirecon-SomePipeline"
+    d = qsirecon_root.joinpath("derivatives", "qsirecon-SomePipeline")
     d.mkdir(parents=True)
-    (d / f"{subject}_{session}.html").touch()
+    _touch(d / f"{subject}_{session}.html")
 
     qsirecon_subject = qsirecon_root / subject
-    assert (
-        is_complete(
-            qsirecon,
-            qsirecon_subject,
-            derivatives_root=derivatives_root,
-            subject=subject,
-            session=session,
-            recon_spec=spec,
-        )
-        is True
+    assert is_complete(
+        qsirecon,
+        qsirecon_subject,
+        derivatives_root=derivatives_root,
+        subject=subject,
+        session=session,
+        recon_spec=spec,
     )
 
 
@@ -877,28 +875,24 @@ def test_qsirecon_recon_spec_empty_falls_back_to_wildcard(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_qsiprep_complete_session_files(tmp_path):
+def test_qsiprep_complete_session_files(root, procs):
     """QSIPrep complete when HTML + all DWI preproc outputs are present."""
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
-
-    qsiprep = next(p for p in DEFAULT_PROCEDURES if p.name == "qsiprep")
+    qsiprep = procs["qsiprep"]
 
     subject, session = "sub-0001", "ses-01"
-    qsiprep_session = tmp_path / "qsiprep" / subject / session
+    qsiprep_session = root.joinpath("qsiprep", subject, session)
     _create_qsiprep_session_files(qsiprep_session, subject, session)
 
-    assert is_complete(qsiprep, qsiprep_session) is True
-
+    assert is_complete(qsiprep, qsiprep_session)
 
-def test_qsiprep_incomplete_empty_dir(tmp_path):
-    from snbb_scheduler.config import DEFAULT_PROCEDURES
 
-    qsiprep = next(p for p in DEFAULT_PROCEDURES if p.name == "qsiprep")
+def test_qsiprep_incomplete_empty_dir(root, procs):
+    qsiprep = procs["qsiprep"]
 
-    qsiprep_session = tmp_path / "qsiprep" / "sub-0001" / "ses-01"
+    qsiprep_session = root.joinpath("qsiprep", "sub-0001", "ses-01")
     qsiprep_session.mkdir(parents=True)
 
-    assert is_complete(qsiprep, qsiprep_session) is False
+    assert not is_complete(qsiprep, qsiprep_session)
 
 
 # (FastSurfer checks removed — procedure replaced by FreeSurfer longitudinal pipeline)
@@ -912,7 +906,7 @@ def test_qsiprep_incomplete_empty_dir(tmp_path):
 def test_file_check_result_fields():
     fc = FileCheckResult(pattern="anat/*.nii.gz", found=True, matched_files=["/a/b.nii.gz"])
     assert fc.pattern == "anat/*.nii.gz"
-    assert fc.found is True
+    assert fc.found
     assert fc.matched_files == ["/a/b.nii.gz"]
 
 
@@ -926,32 +920,32 @@ def test_file_check_result_default_matched_files():
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_nonexistent_none_marker(tmp_path):
-    results = check_detailed(proc_nonempty(), tmp_path / "missing")
+def test_check_detailed_nonexistent_none_marker():
+    results = check_detailed(proc_nonempty(), _MISSING)
     assert len(results) == 1
     assert not results[0].found
     assert results[0].pattern == "<directory>"
 
 
-def test_check_detailed_nonexistent_single_marker(tmp_path):
-    results = check_detailed(proc_marker(), tmp_path / "missing")
+def test_check_detailed_nonexistent_single_marker():
+    results = check_detailed(proc_marker(), _MISSING)
     assert len(results) == 1
     assert not results[0].found
     assert results[0].pattern == "done.txt"
 
 
-def test_check_detailed_nonexistent_glob(tmp_path):
-    results = check_detailed(proc_glob(), tmp_path / "missing")
+def test_check_detailed_nonexistent_glob():
+    results = check_detailed(proc_glob(), _MISSING)
     assert len(results) == 1
     assert not results[0].found
 
 
-def test_check_detailed_nonexistent_list_marker(tmp_path):
+def test_check_detailed_nonexistent_list_marker():
     proc = Procedure(
         name="test", output_dir="test", script="t.sh",
         completion_marker=["anat/*.nii.gz", "dwi/*.nii.gz"]
     )
-    results = check_detailed(proc, tmp_path / "missing")
+    results = check_detailed(proc, _MISSING)
     assert len(results) == 2
     assert all(not r.found for r in results)
 
@@ -961,18 +955,18 @@ def test_check_detailed_nonexistent_list_marker(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_none_marker_empty_dir(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_none_marker_empty_dir(root):
+    d = root / "out"
     d.mkdir()
     results = check_detailed(proc_nonempty(), d)
     assert len(results) == 1
     assert not results[0].found
 
 
-def test_check_detailed_none_marker_populated_dir(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_none_marker_populated_dir(root):
+    d = root / "out"
     d.mkdir()
-    (d / "file.txt").touch()
+    _touch(d / "file.txt")
     results = check_detailed(proc_nonempty(), d)
     assert len(results) == 1
     assert results[0].found
@@ -983,18 +977,18 @@ def test_check_detailed_none_marker_populated_dir(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_single_marker_missing(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_single_marker_missing(root):
+    d = root / "out"
     d.mkdir()
     results = check_detailed(proc_marker(), d)
     assert not results[0].found
     assert results[0].matched_files == []
 
 
-def test_check_detailed_single_marker_present(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_single_marker_present(root):
+    d = root / "out"
     d.mkdir()
-    (d / "done.txt").touch()
+    _touch(d / "done.txt")
     results = check_detailed(proc_marker(), d)
     assert results[0].found
     assert len(results[0].matched_files) == 1
@@ -1005,18 +999,18 @@ def test_check_detailed_single_marker_present(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_glob_no_matches(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_glob_no_matches(root):
+    d = root / "out"
     d.mkdir()
     results = check_detailed(proc_glob(), d)
     assert not results[0].found
     assert results[0].matched_files == []
 
 
-def test_check_detailed_glob_with_matches(tmp_path):
-    d = tmp_path / "out"
+def test_check_detailed_glob_with_matches(root):
+    d = root / "out"
     (d / "anat").mkdir(parents=True)
-    (d / "anat" / "T1w.nii.gz").touch()
+    _touch(d.joinpath("anat", "T1w.nii.gz"))
     results = check_detailed(proc_glob(), d)
     assert results[0].found
     assert len(results[0].matched_files) >= 1
@@ -1027,41 +1021,39 @@ def test_check_detailed_glob_with_matches(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_list_marker_all_found(tmp_path):
+def test_check_detailed_list_marker_all_found(root):
     proc = Procedure(
         name="test", output_dir="test", script="t.sh",
         completion_marker=["anat/*.nii.gz", "dwi/*.bvec"]
     )
-    d = tmp_path / "out"
-    (d / "anat").mkdir(parents=True)
-    (d / "anat" / "T1w.nii.gz").touch()
-    (d / "dwi").mkdir()
-    (d / "dwi" / "run.bvec").touch()
+    d = root / "out"
+    _mkdirs(d, ["anat", "dwi"])
+    _mkfiles(d, ["anat/T1w.nii.gz", "dwi/run.bvec"])
     results = check_detailed(proc, d)
     assert len(results) == 2
     assert all(r.found for r in results)
 
 
-def test_check_detailed_list_marker_partial(tmp_path):
+def test_check_detailed_list_marker_partial(root):
     proc = Procedure(
         name="test", output_dir="test", script="t.sh",
         completion_marker=["anat/*.nii.gz", "dwi/*.bvec"]
     )
-    d = tmp_path / "out"
+    d = root / "out"
     (d / "anat").mkdir(parents=True)
-    (d / "anat" / "T1w.nii.gz").touch()
+    _touch(d.joinpath("anat", "T1w.nii.gz"))
     # dwi missing
     results = check_detailed(proc, d)
     assert results[0].found
     assert not results[1].found
 
 
-def test_check_detailed_list_returns_one_entry_per_pattern(tmp_path):
+def test_check_detailed_list_returns_one_entry_per_pattern(root):
     proc = Procedure(
         name="test", output_dir="test", script="t.sh",
         completion_marker=["a/*.txt", "b/*.txt", "c/*.txt"]
     )
-    d = tmp_path / "out"
+    d = root / "out"
     d.mkdir()
     results = check_detailed(proc, d)
     assert len(results) == 3
@@ -1072,21 +1064,106 @@ def test_check_detailed_list_returns_one_entry_per_pattern(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_check_detailed_specialized_freesurfer_returns_single_entry(tmp_path):
+def test_check_detailed_specialized_freesurfer_returns_single_entry(root):
     proc = Procedure(
         name="freesurfer", output_dir="freesurfer", script="s.sh",
         completion_marker=None
     )
-    results = check_detailed(proc, tmp_path / "freesurfer" / "sub-0001")
+    results = check_detailed(proc, root.joinpath("freesurfer", "sub-0001"))
     assert len(results) == 1
     assert results[0].pattern == "freesurfer"
 
 
-def test_check_detailed_specialized_qsirecon_returns_single_entry(tmp_path):
+def test_check_detailed_specialized_qsirecon_returns_single_entry(root):
     proc = Procedure(
         name="qsirecon", output_dir="qsirecon", script="s.sh",
         completion_marker=None
     )
-    results = check_detailed(proc, tmp_path / "qsirecon" / "sub-0001" / "ses-01")
+    results = check_detailed(proc, root.joinpath("qsirecon", "sub-0001", "ses-01"))
     assert len(results) == 1
     assert results[0].pattern == "qsirecon"
+
+
+# ---------------------------------------------------------------------------
+# _iglob — scandir-based glob used for completion markers
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "**/*.nii.gz",
+        "*.html",
+        "anat/*_T1w.nii.gz",
+        "*/*.nii.gz",
+        "**/dwi/*.nii.gz",
+        "sub-*/ses-*/dwi/*.nii.gz",
+        "*ses-01*",
+        "sub-0001/*/dwi/dwi*",
+        "scripts/recon-all.done",
+        "[!r]*.html",
+        "missing/*.nii.gz",
+        "**",
+    ],
+)
+def test_iglob_matches_pathlib_glob(root, pattern):
+    files = [
+        "report.html",
+        "anat/sub_T1w.nii.gz",
+        "sub-0001/ses-01/dwi/dwi.nii.gz",
+        "scripts/recon-all.done",
+    ]
+    _mkdirs(root, [os.path.dirname(rel) for rel in files])
+    _mkfiles(root, files)
+
+    expected = sorted(str(p) for p in root.glob(pattern))
+    assert sorted(_iglob(root, pattern)) == expected
+
+
+def _segment_kind(segment):
+    return re.Pattern if isinstance(segment, re.Pattern) else type(segment)
+
+
+@pytest.mark.parametrize(
+    "pattern, kinds, relpath",
+    [
+        ("anat/*.nii.gz", [str, _StarMatch], "anat/T1w.nii.gz"),
+        ("**/*.nii.gz", [type(None), _StarMatch], "a/b/T1w.nii.gz"),
+        (
+            "sub-*/ses-*/anat/*.nii.gz",
+            [_StarMatch, _StarMatch, str, _StarMatch],
+            "sub-01/ses-01/anat/T1w.nii.gz",
+        ),
+        ("dwi/*dir-AP*_dwi.bvec", [str, re.Pattern], "dwi/sub_dir-AP_dwi.bvec"),
+    ],
+    ids=["single-level", "recursive", "multi-wildcard", "multi-star"],
+)
+def test_list_marker_fast_paths(root, pattern, kinds, relpath):
+    """Single-``*`` segments compile to prefix/suffix matchers, not regexes."""
+    assert [_segment_kind(seg) for seg in _compile_glob(pattern)] == kinds
+
+    proc = proc_list(patterns=[pattern])
+    d = root / "out"
+    d.mkdir()
+    assert not is_complete(proc, d)
+    _mkdirs(d, [os.path.dirname(relpath)])
+    _touch(d / relpath)
+    assert is_complete(proc, d)
+
+
+@pytest.mark.parametrize(
+    "segment, name, expected",
+    [
+        ("*.nii.gz", "T1w.nii.gz", True),
+        ("*.nii.gz", ".nii.gz", True),
+        ("*.nii.gz", "T1w.nii", False),
+        ("ses-*", "ses-01", True),
+        ("ses-*", "sub-01", False),
+        ("ab*ba", "aba", False),
+        ("ab*ba", "abba", True),
+    ],
+)
+def test_star_match_agrees_with_fnmatch(segment, name, expected):
+    (matcher,) = _compile_glob(segment)
+    assert isinstance(matcher, _StarMatch)
+    assert matcher.match(name) == expected == fnmatch.fnmatchcase(name, segment)
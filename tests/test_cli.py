@@ -1,19 +1,33 @@
 """CLI smoke tests using Click's CliRunner."""
 import csv
+import functools
 import io
+import json
+import shutil
+import subprocess
 from pathlib import Path
-from unittest.mock import MagicMock, patch
 
+import click
 import pandas as pd
 import pytest
 from click.testing import CliRunner
 
-from snbb_scheduler.cli import main
+from snbb_scheduler.cli import main, retry, status
 from snbb_scheduler.config import Procedure, SchedulerConfig
-from snbb_scheduler.manifest import save_state
+from snbb_scheduler.manifest import _empty_state, load_state, save_state
+from snbb_scheduler.submit import SubmissionError
+from tests.conftest import _STATE_FILE, _clone_bids
 
+# Minimal YAML config rooted at {p}; tests append extra keys as needed
+_CFG_TMPL = (
+    "dicom_root: {p}/dicom\n"
+    "bids_root: {p}/bids\n"
+    "derivatives_root: {p}/derivatives\n"
+    "state_file: {p}/" + _STATE_FILE + "\n"
+)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def runner():
     return CliRunner()
 
@@ -22,123 +36,241 @@ def runner():
 def cfg_path(tmp_path):
     """Write a minimal YAML config pointing at tmp_path directories."""
     yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
+    yaml_file.write_text(_CFG_TMPL.format(p=tmp_path))
     return yaml_file
 
 
 @pytest.fixture
-def cfg_with_sessions(tmp_path, cfg_path):
-    """Config + two DICOM sessions on disk."""
-    (tmp_path / "dicom" / "sub-0001" / "ses-01").mkdir(parents=True)
-    (tmp_path / "dicom" / "sub-0002" / "ses-01").mkdir(parents=True)
-    return cfg_path
+def make_cfg(tmp_path):
+    """Factory for a ``SchedulerConfig`` rooted at tmp_path, matching ``cfg_path``."""
+    def _make(**overrides):
+        kwargs = {
+            "dicom_root": tmp_path / "dicom",
+            "bids_root": tmp_path / "bids",
+            "derivatives_root": tmp_path / "derivatives",
+            "state_file": tmp_path / _STATE_FILE,
+        }
+        kwargs.update(overrides)
+        return SchedulerConfig(**kwargs)
+    return _make
 
 
-# ---------------------------------------------------------------------------
-# --help
-# ---------------------------------------------------------------------------
+@pytest.fixture
+def cfg_obj(make_cfg):
+    """In-memory equivalent of ``cfg_path``, for invoking sub-commands directly."""
+    return make_cfg()
 
-def test_main_help(runner):
-    result = runner.invoke(main, ["--help"])
-    assert result.exit_code == 0
-    assert "snbb-scheduler" in result.output
-    assert "--slurm-mem" in result.output
-    assert "--slurm-cpus" in result.output
 
+def _invoke(runner, command, config, args=()):
+    """Run a sub-command with a ready-made config, skipping ``main``'s YAML load."""
+    return runner.invoke(command, list(args), obj={"config": config})
 
-def test_run_help(runner):
-    result = runner.invoke(main, ["run", "--help"])
-    assert result.exit_code == 0
-    assert "--dry-run" in result.output
-    assert "--force" in result.output
-    assert "--procedure" in result.output
 
+# Defaults for state rows; _state_df overrides whole columns
+_BASE_ROW = {
+    "subject": "sub-0001",
+    "session": "ses-01",
+    "procedure": "bids",
+    "status": "pending",
+    "submitted_at": pd.Timestamp("2024-01-01"),
+    "job_id": "1",
+}
 
-def test_manifest_help(runner):
-    result = runner.invoke(main, ["manifest", "--help"])
-    assert result.exit_code == 0
 
+def _state_df(**columns):
+    """Build a state DataFrame column-wise; omitted columns repeat ``_BASE_ROW``."""
+    n = max((len(values) for values in columns.values()), default=1)
+    return pd.DataFrame(
+        {col: columns.get(col, [default] * n) for col, default in _BASE_ROW.items()}
+    )
 
-def test_status_help(runner):
-    result = runner.invoke(main, ["status", "--help"])
-    assert result.exit_code == 0
+
+# Single-row state files shared by tests via ``_copy_state``
+_STATE_VARIANTS = {
+    "pending_bids": {},
+    "running_bids": {"status": ["running"]},
+    "complete_bids": {"status": ["complete"]},
+    "failed_bids": {"status": ["failed"]},
+}
+
+
+@pytest.fixture(scope="session")
+def canonical_states(tmp_path_factory):
+    """Directory of ``<variant><suffix>`` state files, written once per session."""
+    d = tmp_path_factory.mktemp("states")
+    suffix = Path(_STATE_FILE).suffix
+    for name, columns in _STATE_VARIANTS.items():
+        save_state(_state_df(**columns), SchedulerConfig(state_file=d / f"{name}{suffix}"))
+    return d
+
+
+def _copy_state(canonical_states, name, config):
+    """Install the canonical state file *name* as *config*'s state file."""
+    shutil.copyfile(canonical_states / f"{name}{config.state_file.suffix}", config.state_file)
+
+
+@pytest.fixture
+def state_store(monkeypatch):
+    """Keep CLI state in a dict keyed by ``state_file`` instead of parquet on disk."""
+    store = {}
+
+    def fake_load(config):
+        return store.get(config.state_file, _empty_state()).copy()
+
+    def fake_save(state, config):
+        store[config.state_file] = state.copy()
+
+    monkeypatch.setattr("snbb_scheduler.cli.load_state", fake_load)
+    monkeypatch.setattr("snbb_scheduler.cli.save_state", fake_save)
+    return store
+
+
+@pytest.fixture
+def cfg_with_sessions(cfg_obj):
+    """Config + two DICOM sessions on disk."""
+    dicom = cfg_obj.dicom_root
+    dicom.mkdir()
+    for subject in ("sub-0001", "sub-0002"):
+        (dicom / subject).mkdir()
+        (dicom / subject / "ses-01").mkdir()
+    return cfg_obj
 
 
-def test_retry_help(runner):
-    result = runner.invoke(main, ["retry", "--help"])
+@pytest.fixture
+def mock_sbatch(mocker):
+    """Patch ``subprocess.run`` to answer like a successful ``sbatch``."""
+    mock_run = mocker.patch("subprocess.run")
+    mock_run.return_value.stdout = b"Submitted batch job 1\n"
+    return mock_run
+
+
+# ---------------------------------------------------------------------------
+# --help
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=None)
+def _help_text(*names):
+    """Render ``main [names...] --help`` once, without going through CliRunner."""
+    ctx = click.Context(main, info_name="snbb-scheduler")
+    command = main
+    for name in names:
+        command = command.get_command(ctx, name)
+        ctx = click.Context(command, info_name=name, parent=ctx)
+    return command.get_help(ctx)
+
+
+@pytest.mark.parametrize(
+    "cmd, needles",
+    [
+        ([], ["snbb-scheduler", "--slurm-mem", "--slurm-cpus"]),
+        (["run"], ["--dry-run", "--force", "--procedure"]),
+        (["manifest"], []),
+        (["status"], []),
+        (["retry"], ["--procedure", "--subject"]),
+    ],
+    ids=["main", "run", "manifest", "status", "retry"],
+)
+def test_help(cmd, needles):
+    text = _help_text(*cmd)
+    for needle in needles:
+        assert needle in text
+
+
+def test_help_end_to_end(runner):
+    """One real ``--help`` invocation, covering Click's dispatch path."""
+    result = runner.invoke(main, ["--help"])
     assert result.exit_code == 0
-    assert "--procedure" in result.output
-    assert "--subject" in result.output
+    assert "--slurm-log-dir" in result.output
 
 
 # ---------------------------------------------------------------------------
 # run --dry-run
 # ---------------------------------------------------------------------------
 
-def test_run_dry_run_no_dicom(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "run", "--dry-run"])
+def test_run_dry_run_no_dicom(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["run", "--dry-run"])
     assert result.exit_code == 0
     assert "Nothing to submit" in result.output
 
 
 def test_run_dry_run_with_sessions(runner, cfg_with_sessions):
-    result = runner.invoke(main, ["--config", str(cfg_with_sessions), "run", "--dry-run"])
+    result = _invoke(runner, main, cfg_with_sessions, ["run", "--dry-run"])
     assert result.exit_code == 0
     assert "[DRY RUN]" in result.output
 
 
 def test_run_dry_run_does_not_write_state(runner, cfg_with_sessions, tmp_path):
-    runner.invoke(main, ["--config", str(cfg_with_sessions), "run", "--dry-run"])
-    assert not (tmp_path / "state.parquet").exists()
-
-
-def test_slurm_mem_cli_overrides_config(runner, cfg_with_sessions):
-    """--slurm-mem on the CLI overrides the config and reaches sbatch."""
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 1\n"
-        runner.invoke(main, ["--config", str(cfg_with_sessions), "--slurm-mem", "64G", "run"])
-    calls = mock_run.call_args_list
+    _invoke(runner, main, cfg_with_sessions, ["run", "--dry-run"])
+    assert not (tmp_path / _STATE_FILE).exists()
+
+
+@pytest.mark.parametrize(
+    "flag, value, expected",
+    [
+        ("--slurm-mem", "64G", ["--mem=64G"]),
+        ("--slurm-cpus", "4", ["--cpus-per-task=4"]),
+        ("--slurm-log-dir", None, ["--output=", "--error="]),
+    ],
+    ids=["mem", "cpus", "log-dir"],
+)
+def test_slurm_flag_cli_overrides_config(
+    runner, cfg_with_sessions, tmp_path, mock_sbatch, flag, value, expected
+):
+    """Slurm flags on the CLI override the config and reach every sbatch call."""
+    if value is None:
+        value = str(tmp_path / "slurm_logs")
+    _invoke(runner, main, cfg_with_sessions, [flag, value, "run"])
+    calls = mock_sbatch.call_args_list
     assert calls, "sbatch was never called"
     for c in calls:
-        assert "--mem=64G" in c[0][0]
+        cmd = c[0][0]
+        for prefix in expected:
+            assert any(a.startswith(prefix) for a in cmd)
 
 
-def test_slurm_cpus_cli_overrides_config(runner, cfg_with_sessions):
-    """--slurm-cpus on the CLI overrides the config and reaches sbatch."""
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 2\n"
-        runner.invoke(main, ["--config", str(cfg_with_sessions), "--slurm-cpus", "4", "run"])
-    calls = mock_run.call_args_list
-    assert calls, "sbatch was never called"
-    for c in calls:
-        assert "--cpus-per-task=4" in c[0][0]
+def test_slurm_flag_cli_leaves_injected_config_untouched(runner, cfg_obj, tmp_path):
+    original_mem = cfg_obj.slurm_mem
+    result = _invoke(
+        runner, main, cfg_obj,
+        ["--slurm-mem", "64G", "--slurm-log-dir", str(tmp_path / "logs"), "monitor"],
+    )
+    assert result.exit_code == 0
+    assert cfg_obj.slurm_mem == original_mem
+    assert cfg_obj.slurm_log_dir != tmp_path / "logs"
 
 
-def test_run_live_submits_and_saves_state(runner, cfg_with_sessions, tmp_path):
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 42\n"
-        result = runner.invoke(main, ["--config", str(cfg_with_sessions), "run"])
+def test_run_live_submits_and_saves_state(
+    runner, cfg_with_sessions, tmp_path, mock_sbatch
+):
+    result = _invoke(runner, main, cfg_with_sessions, ["run"])
     assert result.exit_code == 0
-    assert (tmp_path / "state.parquet").exists()
+    assert (tmp_path / _STATE_FILE).exists()
+
+
+def test_run_failed_submission_saves_earlier_jobs(runner, cfg_with_sessions, mock_sbatch):
+    """Jobs queued before an sbatch failure are recorded, so they are not resubmitted."""
+    ok = mock_sbatch.return_value
+    mock_sbatch.side_effect = [ok, subprocess.CalledProcessError(1, "sbatch")]
+    result = _invoke(runner, main, cfg_with_sessions, ["run", "--skip-monitor"])
+    assert isinstance(result.exception, SubmissionError)
+    state = load_state(cfg_with_sessions)
+    assert state[["subject", "procedure", "job_id"]].values.tolist() == [
+        ["sub-0001", "bids", "1"]
+    ]
 
 
 # ---------------------------------------------------------------------------
 # manifest
 # ---------------------------------------------------------------------------
 
-def test_manifest_no_sessions(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "manifest"])
+def test_manifest_no_sessions(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["manifest"])
     assert result.exit_code == 0
     assert "No tasks pending" in result.output
 
 
 def test_manifest_shows_procedures(runner, cfg_with_sessions):
-    result = runner.invoke(main, ["--config", str(cfg_with_sessions), "manifest"])
+    result = _invoke(runner, main, cfg_with_sessions, ["manifest"])
     assert result.exit_code == 0
     assert "bids" in result.output
 
@@ -147,25 +279,15 @@ def test_manifest_shows_procedures(runner, cfg_with_sessions):
 # status
 # ---------------------------------------------------------------------------
 
-def test_status_no_state(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "status"])
+def test_status_no_state(runner, cfg_obj):
+    result = _invoke(runner, status, cfg_obj)
     assert result.exit_code == 0
     assert "No state recorded" in result.output
 
 
-def test_status_shows_state(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "running", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "99",
-    }])
-    save_state(state, cfg)
-    result = runner.invoke(main, ["--config", str(cfg_path), "status"])
+def test_status_shows_state(runner, cfg_obj, state_store):
+    state_store[cfg_obj.state_file] = _state_df(status=["running"], job_id=["99"])
+    result = _invoke(runner, status, cfg_obj)
     assert result.exit_code == 0
     assert "sub-0001" in result.output
 
@@ -174,111 +296,58 @@ def test_status_shows_state(runner, cfg_path, tmp_path):
 # retry
 # ---------------------------------------------------------------------------
 
-def test_retry_no_state(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "retry"])
+def test_retry_no_state(runner, cfg_obj):
+    result = _invoke(runner, retry, cfg_obj)
     assert result.exit_code == 0
     assert "No state recorded" in result.output
 
 
-def test_retry_no_matching_failures(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "1",
-    }])
-    save_state(state, cfg)
-    result = runner.invoke(main, ["--config", str(cfg_path), "retry", "--procedure", "bids"])
+def test_retry_no_matching_failures(runner, cfg_obj, state_store):
+    state_store[cfg_obj.state_file] = _state_df(status=["complete"])
+    result = _invoke(runner, retry, cfg_obj, ["--procedure", "bids"])
     assert result.exit_code == 0
     assert "No matching failed" in result.output
 
 
-def test_retry_clears_failed_entries(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+def test_retry_clears_failed_entries(runner, cfg_obj, state_store):
+    state_store[cfg_obj.state_file] = _state_df(
+        subject=["sub-0001", "sub-0002"],
+        status=["failed", "complete"],
+        job_id=["1", "2"],
     )
-    state = pd.DataFrame([
-        {"subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-         "status": "failed", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "1"},
-        {"subject": "sub-0002", "session": "ses-01", "procedure": "bids",
-         "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "2"},
-    ])
-    save_state(state, cfg)
-    result = runner.invoke(main, ["--config", str(cfg_path), "retry", "--procedure", "bids"])
+    result = _invoke(runner, retry, cfg_obj, ["--procedure", "bids"])
     assert result.exit_code == 0
     assert "Cleared 1" in result.output
 
-    # Reload state — only the complete row should remain
-    from snbb_scheduler.manifest import load_state
-    remaining = load_state(cfg)
+    # Only the complete row should remain in the saved state
+    remaining = state_store[cfg_obj.state_file]
     assert len(remaining) == 1
     assert remaining.iloc[0]["status"] == "complete"
 
 
-def test_retry_clears_pending_entries(runner, tmp_path):
+def test_retry_clears_pending_entries(runner, cfg_obj, state_store):
     """--status pending clears stuck pending jobs (e.g. silently cancelled by Slurm)."""
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
+    state_store[cfg_obj.state_file] = _state_df(
+        subject=["sub-0001", "sub-0002"],
+        procedure=["qsiprep", "qsiprep"],
+        status=["pending", "complete"],
+        job_id=["55", "56"],
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([
-        {"subject": "sub-0001", "session": "ses-01", "procedure": "qsiprep",
-         "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "55"},
-        {"subject": "sub-0002", "session": "ses-01", "procedure": "qsiprep",
-         "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "56"},
-    ])
-    save_state(state, cfg)
-    result = runner.invoke(
-        main, ["--config", str(yaml_file), "retry", "--procedure", "qsiprep", "--status", "pending"]
+    result = _invoke(
+        runner, main, cfg_obj, ["retry", "--procedure", "qsiprep", "--status", "pending"]
     )
     assert result.exit_code == 0
     assert "Cleared 1" in result.output
 
-    from snbb_scheduler.manifest import load_state as _load
-    remaining = _load(cfg)
+    remaining = state_store[cfg_obj.state_file]
     assert len(remaining) == 1
     assert remaining.iloc[0]["status"] == "complete"
 
 
-def test_retry_no_matching_for_status(runner, tmp_path):
+def test_retry_no_matching_for_status(runner, cfg_obj, state_store):
     """--status pending returns 'No matching' when no pending entries exist."""
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "qsiprep",
-        "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "1",
-    }])
-    save_state(state, cfg)
-    result = runner.invoke(
-        main, ["--config", str(yaml_file), "retry", "--status", "pending"]
-    )
+    state_store[cfg_obj.state_file] = _state_df(procedure=["qsiprep"], status=["complete"])
+    result = _invoke(runner, main, cfg_obj, ["retry", "--status", "pending"])
     assert result.exit_code == 0
     assert "No matching pending" in result.output
 
@@ -287,70 +356,29 @@ def test_retry_no_matching_for_status(runner, tmp_path):
 # --force
 # ---------------------------------------------------------------------------
 
-def _add_bids(tmp_path, subject, session):
-    """Create BIDS modality files matching the bids completion_marker."""
-    bids_dir = tmp_path / "bids" / subject / session
-    files = {
-        "anat": ["sub_T1w.nii.gz"],
-        "dwi": [
-            "sub_dir-AP_dwi.nii.gz",
-            "sub_dir-AP_dwi.bvec",
-            "sub_dir-AP_dwi.bval",
-            # Short reverse-PE DWI; heudiconv places it in dwi/ (not fmap/)
-            "sub_dir-PA_dwi.nii.gz",
-        ],
-        "fmap": [
-            "sub_acq-func_dir-AP_epi.nii.gz",
-            "sub_acq-func_dir-PA_epi.nii.gz",
-        ],
-        "func": ["sub_task-rest_bold.nii.gz"],
-    }
-    for subdir, names in files.items():
-        d = bids_dir / subdir
-        d.mkdir(parents=True, exist_ok=True)
-        for name in names:
-            (d / name).touch()
-
-
 @pytest.fixture
-def cfg_with_bids_complete(tmp_path, cfg_path):
-    """Config + DICOM + complete BIDS for sub-0001/ses-01."""
+def cfg_with_bids_complete(tmp_path, cfg_obj, _bids_template):
+    """Config + DICOM + complete BIDS (cloned from the template) for sub-0001/ses-01."""
     (tmp_path / "dicom" / "sub-0001" / "ses-01").mkdir(parents=True)
-    _add_bids(tmp_path, "sub-0001", "ses-01")
-    return cfg_path
+    _clone_bids(_bids_template, tmp_path.joinpath("bids", "sub-0001", "ses-01"))
+    return cfg_obj
 
 
 def test_force_resubmits_complete_procedure(runner, cfg_with_bids_complete):
     """--force causes already-complete procedures to be re-submitted."""
-    result = runner.invoke(
-        main,
-        ["--config", str(cfg_with_bids_complete), "run", "--force", "--dry-run"],
-    )
+    result = _invoke(runner, main, cfg_with_bids_complete, ["run", "--force", "--dry-run"])
     assert result.exit_code == 0
     # bids is complete but --force means it appears in dry-run output
     assert "[DRY RUN]" in result.output
     assert "bids" in result.output
 
 
-def test_force_bypasses_in_flight_filter(runner, cfg_with_sessions, tmp_path):
+def test_force_bypasses_in_flight_filter(runner, cfg_with_sessions, canonical_states):
     """--force submits tasks even when they are already pending/running in state."""
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
     # Mark sub-0001/ses-01/bids as already running
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "running", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "7",
-    }])
-    save_state(state, cfg)
+    _copy_state(canonical_states, "running_bids", cfg_with_sessions)
 
-    result = runner.invoke(
-        main,
-        ["--config", str(cfg_with_sessions), "run", "--force", "--dry-run"],
-    )
+    result = _invoke(runner, main, cfg_with_sessions, ["run", "--force", "--dry-run"])
     assert result.exit_code == 0
     assert "--force: skipping in-flight filter" in result.output
     assert "[DRY RUN]" in result.output
@@ -358,93 +386,62 @@ def test_force_bypasses_in_flight_filter(runner, cfg_with_sessions, tmp_path):
 
 def test_force_procedure_limits_forced_procedure(runner, cfg_with_bids_complete):
     """--force --procedure bids only forces bids, not other procedures."""
-    result = runner.invoke(
+    result = _invoke(
+        runner,
         main,
-        [
-            "--config", str(cfg_with_bids_complete),
-            "run", "--force", "--procedure", "bids", "--dry-run",
-        ],
+        cfg_with_bids_complete,
+        ["run", "--force", "--procedure", "bids", "--dry-run"],
     )
     assert result.exit_code == 0
     assert "[DRY RUN]" in result.output
 
 
-def test_slurm_log_dir_in_help(runner):
+def test_slurm_log_dir_in_help():
     """--slurm-log-dir appears in the main group help text."""
-    result = runner.invoke(main, ["--help"])
-    assert result.exit_code == 0
-    assert "--slurm-log-dir" in result.output
-
-
-def test_slurm_log_dir_cli_overrides_config(runner, cfg_with_sessions, tmp_path):
-    """--slurm-log-dir on the CLI overrides config and reaches sbatch as --output/--error."""
-    log_dir = tmp_path / "slurm_logs"
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 3\n"
-        runner.invoke(
-            main,
-            ["--config", str(cfg_with_sessions), "--slurm-log-dir", str(log_dir), "run"],
-        )
-    calls = mock_run.call_args_list
-    assert calls, "sbatch was never called"
-    for c in calls:
-        cmd = c[0][0]
-        assert any(a.startswith("--output=") for a in cmd)
-        assert any(a.startswith("--error=") for a in cmd)
+    assert "--slurm-log-dir" in _help_text()
 
 
 # ---------------------------------------------------------------------------
 # monitor command
 # ---------------------------------------------------------------------------
 
-def test_monitor_help(runner):
-    result = runner.invoke(main, ["monitor", "--help"])
+def test_monitor_help():
+    assert "monitor" in _help_text("monitor")
+
+
+def test_explicit_config_overrides_obj_config(runner, cfg_path):
+    """--config wins over a config passed in via the context object."""
+    elsewhere = SchedulerConfig(state_file=cfg_path.parent / "other" / "state.parquet")
+    result = runner.invoke(
+        main, ["--config", str(cfg_path), "monitor"], obj={"config": elsewhere}
+    )
     assert result.exit_code == 0
+    assert "No state recorded" in result.output
+    assert not elsewhere.state_file.parent.exists()
 
 
-def test_monitor_no_state(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "monitor"])
+def test_monitor_no_state(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["monitor"])
     assert result.exit_code == 0
     assert "No state recorded" in result.output
 
 
-def test_monitor_with_in_flight_jobs(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "99",
-    }])
-    save_state(state, cfg)
+def test_monitor_with_in_flight_jobs(runner, cfg_obj, canonical_states, mocker):
+    _copy_state(canonical_states, "pending_bids", cfg_obj)
 
-    with patch("snbb_scheduler.monitor.poll_jobs", return_value={"99": "complete"}):
-        result = runner.invoke(main, ["--config", str(cfg_path), "monitor"])
+    mocker.patch("snbb_scheduler.monitor.poll_jobs", return_value={"1": "complete"})
+    result = _invoke(runner, main, cfg_obj, ["monitor"])
     assert result.exit_code == 0
 
-    from snbb_scheduler.manifest import load_state
-    updated = load_state(cfg)
+    updated = load_state(cfg_obj)
     assert updated.iloc[0]["status"] == "complete"
 
 
-def test_monitor_no_transitions_exits_ok(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "100",
-    }])
-    save_state(state, cfg)
+def test_monitor_no_transitions_exits_ok(runner, cfg_obj, canonical_states, mocker):
+    _copy_state(canonical_states, "pending_bids", cfg_obj)
 
-    with patch("snbb_scheduler.monitor.poll_jobs", return_value={"100": "pending"}):
-        result = runner.invoke(main, ["--config", str(cfg_path), "monitor"])
+    mocker.patch("snbb_scheduler.monitor.poll_jobs", return_value={"1": "pending"})
+    result = _invoke(runner, main, cfg_obj, ["monitor"])
     assert result.exit_code == 0
 
 
@@ -452,82 +449,50 @@ def test_monitor_no_transitions_exits_ok(runner, cfg_path, tmp_path):
 # run --skip-monitor
 # ---------------------------------------------------------------------------
 
-def test_run_skip_monitor_no_sacct_called(runner, cfg_with_sessions, tmp_path):
+def test_run_skip_monitor_no_sacct_called(
+    runner, cfg_with_sessions, canonical_states, mock_sbatch, mocker
+):
     """--skip-monitor means poll_jobs is never called."""
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "7",
-    }])
-    save_state(state, cfg)
+    _copy_state(canonical_states, "pending_bids", cfg_with_sessions)
 
-    with patch("snbb_scheduler.monitor.poll_jobs") as mock_poll, \
-         patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 1\n"
-        runner.invoke(
-            main,
-            ["--config", str(cfg_with_sessions), "run", "--skip-monitor", "--dry-run"],
-        )
+    mock_poll = mocker.patch("snbb_scheduler.monitor.poll_jobs")
+    _invoke(runner, main, cfg_with_sessions, ["run", "--skip-monitor", "--dry-run"])
     mock_poll.assert_not_called()
 
 
-def test_run_skip_monitor_in_help(runner):
-    result = runner.invoke(main, ["run", "--help"])
-    assert "--skip-monitor" in result.output
+def test_run_skip_monitor_in_help():
+    assert "--skip-monitor" in _help_text("run")
 
 
 # ---------------------------------------------------------------------------
 # enhanced status
 # ---------------------------------------------------------------------------
 
-def test_status_shows_summary_section(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+def test_status_shows_summary_section(runner, cfg_obj):
+    state = _state_df(
+        subject=["sub-0001", "sub-0002"],
+        status=["complete", "pending"],
+        job_id=["1", "2"],
     )
-    state = pd.DataFrame([
-        {"subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-         "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "1"},
-        {"subject": "sub-0002", "session": "ses-01", "procedure": "bids",
-         "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "2"},
-    ])
-    save_state(state, cfg)
-    result = runner.invoke(main, ["--config", str(cfg_path), "status"])
+    save_state(state, cfg_obj)
+    result = _invoke(runner, main, cfg_obj, ["status"])
     assert result.exit_code == 0
     assert "Summary" in result.output
     assert "procedure" in result.output or "bids" in result.output
     assert "count" in result.output or "1" in result.output
 
 
-def test_status_with_slurm_log_dir(runner, tmp_path):
+def test_status_with_slurm_log_dir(runner, tmp_path, make_cfg, canonical_states):
     log_dir = tmp_path / "slurm_logs"
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"slurm_log_dir: {log_dir}\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"slurm_log_dir: {log_dir}\n"
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+    cfg = make_cfg(
         slurm_log_dir=log_dir,
     )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "11",
-    }])
-    save_state(state, cfg)
+    _copy_state(canonical_states, "complete_bids", cfg)
     result = runner.invoke(main, ["--config", str(yaml_file), "status"])
     assert result.exit_code == 0
     assert "log_path" in result.output
@@ -537,116 +502,63 @@ def test_status_with_slurm_log_dir(runner, tmp_path):
 # retry audit
 # ---------------------------------------------------------------------------
 
-def test_retry_writes_audit_log(runner, cfg_path, tmp_path):
+def test_retry_writes_audit_log(runner, tmp_path, make_cfg, canonical_states):
     log_file = tmp_path / "audit.jsonl"
     yaml_file = tmp_path / "config_audit.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"log_file: {log_file}\n"
-    )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+        _CFG_TMPL.format(p=tmp_path)
+        + f"log_file: {log_file}\n"
     )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "failed", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "5",
-    }])
-    save_state(state, cfg)
+    cfg = make_cfg()
+    _copy_state(canonical_states, "failed_bids", cfg)
     result = runner.invoke(main, ["--config", str(yaml_file), "retry", "--procedure", "bids"])
     assert result.exit_code == 0
-    import json
     record = json.loads(log_file.read_text())
     assert record["event"] == "retry_cleared"
 
 
-def test_run_monitor_updates_state(runner, tmp_path):
+def test_run_monitor_updates_state(
+    runner, tmp_path, make_cfg, canonical_states, mock_sbatch, mocker
+):
     """run without --skip-monitor calls monitor and saves updated state."""
     yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "77",
-    }])
-    save_state(state, cfg)
+    yaml_file.write_text(_CFG_TMPL.format(p=tmp_path))
+    cfg = make_cfg()
+    _copy_state(canonical_states, "pending_bids", cfg)
 
-    with patch("snbb_scheduler.monitor.poll_jobs", return_value={"77": "complete"}), \
-         patch("subprocess.run") as mock_run:
-        mock_run.return_value.stdout = "Submitted batch job 1\n"
-        result = runner.invoke(main, ["--config", str(yaml_file), "run", "--dry-run"])
+    mocker.patch("snbb_scheduler.monitor.poll_jobs", return_value={"1": "complete"})
+    result = runner.invoke(main, ["--config", str(yaml_file), "run", "--dry-run"])
     assert result.exit_code == 0
 
-    from snbb_scheduler.manifest import load_state
     updated = load_state(cfg)
     assert updated.iloc[0]["status"] == "complete"
 
 
-def test_run_monitor_exception_handled_gracefully(runner, tmp_path):
+def test_run_monitor_exception_handled_gracefully(
+    runner, tmp_path, make_cfg, canonical_states, mocker
+):
     """If monitor raises, run continues without crashing."""
     yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "78",
-    }])
-    save_state(state, cfg)
+    yaml_file.write_text(_CFG_TMPL.format(p=tmp_path))
+    cfg = make_cfg()
+    _copy_state(canonical_states, "pending_bids", cfg)
 
-    with patch("snbb_scheduler.cli.update_state_from_sacct", side_effect=RuntimeError("oops")):
-        result = runner.invoke(main, ["--config", str(yaml_file), "run", "--dry-run"])
+    mocker.patch(
+        "snbb_scheduler.cli.update_state_from_sacct", side_effect=RuntimeError("oops")
+    )
+    result = runner.invoke(main, ["--config", str(yaml_file), "run", "--dry-run"])
     assert result.exit_code == 0
 
 
-def test_status_log_path_unknown_procedure(runner, tmp_path):
+def test_status_log_path_unknown_procedure(runner, tmp_path, make_cfg, state_store):
     """status with slurm_log_dir + unknown procedure name uses fallback job_name."""
-    log_dir = tmp_path / "slurm_logs"
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"slurm_log_dir: {log_dir}\n"
+    cfg = make_cfg(slurm_log_dir=tmp_path / "slurm_logs")
+    state_store[cfg.state_file] = _state_df(
+        procedure=["unknown_proc"],
+        status=["complete"],
+        job_id=["99"],
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
-        slurm_log_dir=log_dir,
-    )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "unknown_proc",
-        "status": "complete", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "99",
-    }])
-    save_state(state, cfg)
-    result = runner.invoke(main, ["--config", str(yaml_file), "status"])
+    result = _invoke(runner, main, cfg, ["status"])
     assert result.exit_code == 0
     assert "log_path" in result.output
 
@@ -670,10 +582,7 @@ def test_status_reconciles_with_filesystem(runner, tmp_path):
     )
 
     # Create a "pending" state entry for bids_post
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids_post",
-        "status": "pending", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "42",
-    }])
+    state = _state_df(procedure=["bids_post"], job_id=["42"])
     save_state(state, cfg)
 
     # Create the completion marker that bids_post checks for
@@ -687,28 +596,19 @@ def test_status_reconciles_with_filesystem(runner, tmp_path):
     assert "pending" not in result.output
 
     # State file should be updated on disk
-    saved = pd.read_parquet(state_file)
+    saved = load_state(cfg)
     assert saved.loc[saved["procedure"] == "bids_post", "status"].iloc[0] == "complete"
 
 
-def test_retry_filter_by_subject(runner, cfg_path, tmp_path):
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+def test_retry_filter_by_subject(runner, cfg_obj, state_store):
+    state_store[cfg_obj.state_file] = _state_df(
+        subject=["sub-0001", "sub-0002"],
+        status=["failed", "failed"],
+        job_id=["1", "2"],
     )
-    state = pd.DataFrame([
-        {"subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-         "status": "failed", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "1"},
-        {"subject": "sub-0002", "session": "ses-01", "procedure": "bids",
-         "status": "failed", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "2"},
-    ])
-    save_state(state, cfg)
-    runner.invoke(main, ["--config", str(cfg_path), "retry", "--subject", "sub-0001"])
+    _invoke(runner, retry, cfg_obj, ["--subject", "sub-0001"])
 
-    from snbb_scheduler.manifest import load_state
-    remaining = load_state(cfg)
+    remaining = state_store[cfg_obj.state_file]
     assert len(remaining) == 1
     assert remaining.iloc[0]["subject"] == "sub-0002"
 
@@ -728,16 +628,15 @@ def _simple_procedures():
     ]
 
 
-def test_session_status_help(runner):
-    result = runner.invoke(main, ["session-status", "--help"])
-    assert result.exit_code == 0
-    assert "--format" in result.output
-    assert "--subject" in result.output
-    assert "--procedure" in result.output
+def test_session_status_help():
+    text = _help_text("session-status")
+    assert "--format" in text
+    assert "--subject" in text
+    assert "--procedure" in text
 
 
-def test_session_status_no_sessions(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "session-status"])
+def test_session_status_no_sessions(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["session-status"])
     assert result.exit_code == 0
     assert "No sessions found" in result.output
 
@@ -753,11 +652,8 @@ def test_session_status_output_exists(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -769,71 +665,53 @@ def test_session_status_output_exists(runner, tmp_path):
     assert str(bids_dir) in result.output
 
 
-def test_session_status_log_path_when_state_with_job_id(runner, tmp_path):
+def test_session_status_log_path_when_state_with_job_id(
+    runner, tmp_path, make_cfg, canonical_states
+):
     """Missing output + state with job_id + slurm_log_dir → shows log path."""
     (tmp_path / "dicom" / "sub-0001" / "ses-01").mkdir(parents=True)
     log_dir = tmp_path / "slurm_logs"
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"slurm_log_dir: {log_dir}\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"slurm_log_dir: {log_dir}\n"
         f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
         f"    scope: session\n"
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+    cfg = make_cfg(
         slurm_log_dir=log_dir,
         procedures=_simple_procedures()[:1],
     )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "running", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "12345",
-    }])
-    save_state(state, cfg)
+    _copy_state(canonical_states, "running_bids", cfg)
 
     result = runner.invoke(main, ["--config", str(yaml_file), "session-status"])
     assert result.exit_code == 0
-    assert "bids_sub-0001_ses-01_12345.out" in result.output
+    assert "bids_sub-0001_ses-01_1.out" in result.output
 
 
-def test_session_status_shows_status_string_without_log_dir(runner, tmp_path):
+def test_session_status_shows_status_string_without_log_dir(
+    runner, tmp_path, make_cfg, canonical_states
+):
     """Missing output + state but no slurm_log_dir → shows status string."""
     (tmp_path / "dicom" / "sub-0001" / "ses-01").mkdir(parents=True)
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
         f"    scope: session\n"
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+    cfg = make_cfg(
         procedures=_simple_procedures()[:1],
     )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "ses-01", "procedure": "bids",
-        "status": "failed", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "99",
-    }])
-    save_state(state, cfg)
+    _copy_state(canonical_states, "failed_bids", cfg)
 
     result = runner.invoke(main, ["--config", str(yaml_file), "session-status"])
     assert result.exit_code == 0
@@ -846,11 +724,8 @@ def test_session_status_dash_when_no_state(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -863,7 +738,7 @@ def test_session_status_dash_when_no_state(runner, tmp_path):
     assert "-" in result.output
 
 
-def test_session_status_subject_scoped_same_for_all_sessions(runner, tmp_path):
+def test_session_status_subject_scoped_same_for_all_sessions(runner, tmp_path, make_cfg):
     """Subject-scoped procedure shows same value for all sessions of a subject."""
     (tmp_path / "dicom" / "sub-0001" / "ses-01").mkdir(parents=True)
     (tmp_path / "dicom" / "sub-0001" / "ses-02").mkdir(parents=True)
@@ -871,32 +746,27 @@ def test_session_status_subject_scoped_same_for_all_sessions(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"slurm_log_dir: {log_dir}\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"slurm_log_dir: {log_dir}\n"
         f"procedures:\n"
         f"  - name: freesurfer\n"
         f"    output_dir: freesurfer\n"
         f"    script: run_fs.sh\n"
         f"    scope: subject\n"
     )
-    cfg = SchedulerConfig(
-        dicom_root=tmp_path / "dicom",
-        bids_root=tmp_path / "bids",
-        derivatives_root=tmp_path / "derivatives",
-        state_file=tmp_path / "state.parquet",
+    cfg = make_cfg(
         slurm_log_dir=log_dir,
         procedures=[Procedure(
             name="freesurfer", output_dir="freesurfer",
             script="run_fs.sh", scope="subject",
         )],
     )
-    state = pd.DataFrame([{
-        "subject": "sub-0001", "session": "", "procedure": "freesurfer",
-        "status": "running", "submitted_at": pd.Timestamp("2024-01-01"), "job_id": "555",
-    }])
+    state = _state_df(
+        session=[""],
+        procedure=["freesurfer"],
+        status=["running"],
+        job_id=["555"],
+    )
     save_state(state, cfg)
 
     result = runner.invoke(main, ["--config", str(yaml_file), "session-status"])
@@ -921,11 +791,8 @@ def test_session_status_subject_filter(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -946,11 +813,8 @@ def test_session_status_procedure_filter(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -977,11 +841,8 @@ def test_session_status_unknown_procedure_filter(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -1001,11 +862,8 @@ def test_session_status_csv_format(runner, tmp_path):
 
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        f"procedures:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + f"procedures:\n"
         f"  - name: bids\n"
         f"    output_dir: ''\n"
         f"    script: run_bids.sh\n"
@@ -1027,19 +885,18 @@ def test_session_status_csv_format(runner, tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_audit_help(runner):
-    result = runner.invoke(main, ["audit", "--help"])
-    assert result.exit_code == 0
-    assert "--format" in result.output
-    assert "--output" in result.output
-    assert "--email" in result.output
-    assert "--dicom-only" in result.output
-    assert "--logs-only" in result.output
-    assert "--history" in result.output
+def test_audit_help():
+    text = _help_text("audit")
+    assert "--format" in text
+    assert "--output" in text
+    assert "--email" in text
+    assert "--dicom-only" in text
+    assert "--logs-only" in text
+    assert "--history" in text
 
 
-def test_audit_no_sessions(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "audit"])
+def test_audit_no_sessions(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["audit"])
     assert result.exit_code == 0
     assert "Executive Summary" in result.output
 
@@ -1061,34 +918,23 @@ def test_audit_with_sessions(runner, tmp_path):
 
 def test_audit_json_format(runner, tmp_path):
     yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
+    yaml_file.write_text(_CFG_TMPL.format(p=tmp_path))
     result = runner.invoke(main, ["--config", str(yaml_file), "audit", "--format", "json"])
     assert result.exit_code == 0
-    import json
     # Output should contain JSON (may have extra text from save_report echo)
     # Find the JSON portion
     assert '"timestamp"' in result.output
 
 
-def test_audit_markdown_format(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "audit", "--format", "markdown"])
+def test_audit_markdown_format(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["audit", "--format", "markdown"])
     assert result.exit_code == 0
     assert "# SNBB Scheduler Audit Report" in result.output
 
 
 def test_audit_output_to_file(runner, tmp_path):
     yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-    )
+    yaml_file.write_text(_CFG_TMPL.format(p=tmp_path))
     out_file = tmp_path / "report.md"
     result = runner.invoke(
         main, ["--config", str(yaml_file), "audit", "--output", str(out_file)]
@@ -1098,8 +944,8 @@ def test_audit_output_to_file(runner, tmp_path):
     assert "Executive Summary" in out_file.read_text()
 
 
-def test_audit_dicom_only(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "audit", "--dicom-only"])
+def test_audit_dicom_only(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["audit", "--dicom-only"])
     assert result.exit_code == 0
     assert "Executive Summary" in result.output
 
@@ -1122,31 +968,28 @@ def test_audit_subject_filter(runner, tmp_path):
     assert "sub-0001" in result.output
 
 
-def test_audit_email_no_recipients_warns(runner, cfg_path):
-    result = runner.invoke(main, ["--config", str(cfg_path), "audit", "--email"])
+def test_audit_email_no_recipients_warns(runner, cfg_obj):
+    result = _invoke(runner, main, cfg_obj, ["audit", "--email"])
     assert result.exit_code == 0
     assert "no email_recipients" in result.output
 
 
-def test_audit_email_sends(runner, tmp_path):
+def test_audit_email_sends(runner, tmp_path, mocker):
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        "audit:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + "audit:\n"
         "  email_recipients:\n"
         "    - test@example.com\n"
     )
-    with patch("snbb_scheduler.report.smtplib.SMTP") as mock_smtp_cls:
-        mock_smtp = MagicMock()
-        mock_smtp_cls.return_value.__enter__ = MagicMock(return_value=mock_smtp)
-        mock_smtp_cls.return_value.__exit__ = MagicMock(return_value=False)
-
-        result = runner.invoke(
-            main, ["--config", str(yaml_file), "audit", "--email"]
-        )
+    mock_smtp_cls = mocker.patch("snbb_scheduler.report.smtplib.SMTP")
+    mock_smtp = mocker.MagicMock()
+    mock_smtp_cls.return_value.__enter__ = mocker.MagicMock(return_value=mock_smtp)
+    mock_smtp_cls.return_value.__exit__ = mocker.MagicMock(return_value=False)
+
+    result = runner.invoke(
+        main, ["--config", str(yaml_file), "audit", "--email"]
+    )
     assert result.exit_code == 0
     assert "emailed" in result.output
 
@@ -1155,11 +998,8 @@ def test_audit_saves_json_when_report_dir_set(runner, tmp_path):
     report_dir = tmp_path / "reports"
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
-        f"dicom_root: {tmp_path / 'dicom'}\n"
-        f"bids_root: {tmp_path / 'bids'}\n"
-        f"derivatives_root: {tmp_path / 'derivatives'}\n"
-        f"state_file: {tmp_path / 'state.parquet'}\n"
-        "audit:\n"
+        _CFG_TMPL.format(p=tmp_path)
+        + "audit:\n"
         f"  report_dir: {report_dir}\n"
     )
     result = runner.invoke(main, ["--config", str(yaml_file), "audit"])
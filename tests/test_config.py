@@ -10,19 +10,23 @@ from snbb_scheduler.config import DEFAULT_PROCEDURES, AuditConfig, Procedure, Sc
 # ---------------------------------------------------------------------------
 
 
-def test_defaults():
-    cfg = SchedulerConfig()
-    assert cfg.dicom_root == Path("/data/snbb/dicom")
-    assert cfg.bids_root == Path("/data/snbb/bids")
-    assert cfg.derivatives_root == Path("/data/snbb/derivatives")
-    assert cfg.slurm_partition == "debug"
-    assert cfg.slurm_account == "snbb"
-    assert cfg.state_file == Path("/data/snbb/.scheduler_state.parquet")
+@pytest.fixture
+def default_cfg():
+    """A default ``SchedulerConfig``."""
+    return SchedulerConfig()
+
 
+def test_defaults(default_cfg):
+    assert default_cfg.dicom_root == Path("/data/snbb/dicom")
+    assert default_cfg.bids_root == Path("/data/snbb/bids")
+    assert default_cfg.derivatives_root == Path("/data/snbb/derivatives")
+    assert default_cfg.slurm_partition == "debug"
+    assert default_cfg.slurm_account == "snbb"
+    assert default_cfg.state_file == Path("/data/snbb/.scheduler_state.parquet")
 
-def test_default_procedures_present():
-    cfg = SchedulerConfig()
-    names = [p.name for p in cfg.procedures]
+
+def test_default_procedures_present(default_cfg):
+    names = [p.name for p in default_cfg.procedures]
     assert "bids" in names
     assert "bids_post" in names
     assert "defacing" in names
@@ -30,14 +34,34 @@ def test_default_procedures_present():
     assert "freesurfer" in names
 
 
-def test_defacing_procedure_attributes():
-    cfg = SchedulerConfig()
-    defacing = cfg.get_procedure("defacing")
-    assert defacing.output_dir == ""
-    assert defacing.script == "snbb_run_defacing.sh"
-    assert defacing.scope == "session"
-    assert defacing.depends_on == ["bids_post"]
-    assert defacing.completion_marker == "anat/*acq-defaced*_T1w.nii.gz"
+@pytest.mark.parametrize(
+    "name, output_dir, script, scope, depends_on, completion_marker",
+    [
+        (
+            "bids_post", "", "snbb_run_bids_post.sh", "session", ["bids"],
+            "fmap/*acq-dwi*_epi.nii.gz",
+        ),
+        (
+            "defacing", "", "snbb_run_defacing.sh", "session", ["bids_post"],
+            "anat/*acq-defaced*_T1w.nii.gz",
+        ),
+        # freesurfer uses the longitudinal pipeline with a specialised check
+        ("freesurfer", "freesurfer", "snbb_run_freesurfer.sh", "subject", ["bids_post"], None),
+        (
+            "qsirecon", "qsirecon", "snbb_run_qsirecon.sh", "session",
+            ["qsiprep", "freesurfer"], None,
+        ),
+    ],
+    ids=["bids_post", "defacing", "freesurfer", "qsirecon"],
+)
+def test_default_procedure_attributes(
+    default_cfg, name, output_dir, script, scope, depends_on, completion_marker
+):
+    proc = default_cfg.get_procedure(name)
+    assert (proc.output_dir, proc.script, proc.scope, proc.depends_on) == (
+        output_dir, script, scope, depends_on
+    )
+    assert proc.completion_marker == completion_marker
 
 
 def test_defacing_uses_bids_root():
@@ -46,9 +70,8 @@ def test_defacing_uses_bids_root():
     assert cfg.get_procedure_root(defacing) == Path("/data/bids")
 
 
-def test_defacing_comes_after_bids_post_in_order():
-    cfg = SchedulerConfig()
-    names = [p.name for p in cfg.procedures]
+def test_defacing_comes_after_bids_post_in_order(default_cfg):
+    names = [p.name for p in default_cfg.procedures]
     assert names.index("defacing") > names.index("bids_post")
 
 
@@ -114,46 +137,40 @@ def test_get_procedure_root_custom_procedure():
 # ---------------------------------------------------------------------------
 
 
-def test_get_procedure_known():
-    cfg = SchedulerConfig()
-    proc = cfg.get_procedure("qsiprep")
+def test_get_procedure_known(default_cfg):
+    proc = default_cfg.get_procedure("qsiprep")
     assert proc.name == "qsiprep"
 
 
-def test_get_procedure_unknown_raises():
-    cfg = SchedulerConfig()
+def test_get_procedure_unknown_raises(default_cfg):
     with pytest.raises(KeyError, match="fmriprep"):
-        cfg.get_procedure("fmriprep")
+        default_cfg.get_procedure("fmriprep")
 
 
 # ---------------------------------------------------------------------------
-# from_yaml
+# from_yaml / from_mapping
 # ---------------------------------------------------------------------------
 
 
-def test_from_yaml_overrides_paths(tmp_path):
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        "dicom_root: /my/dicom\n"
-        "slurm_partition: gpu\n"
-        "slurm_account: mylab\n"
+def test_from_mapping_overrides_paths():
+    cfg = SchedulerConfig.from_mapping(
+        {"dicom_root": "/my/dicom", "slurm_partition": "gpu", "slurm_account": "mylab"}
     )
-    cfg = SchedulerConfig.from_yaml(yaml_file)
     assert cfg.dicom_root == Path("/my/dicom")
     assert cfg.slurm_partition == "gpu"
     assert cfg.slurm_account == "mylab"
     assert cfg.bids_root == Path("/data/snbb/bids")  # unchanged default
 
 
-def test_from_yaml_all_path_fields_are_paths(tmp_path):
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        "dicom_root: /a/dicom\n"
-        "bids_root: /a/bids\n"
-        "derivatives_root: /a/derivatives\n"
-        "state_file: /a/state.parquet\n"
+def test_from_mapping_all_path_fields_are_paths():
+    cfg = SchedulerConfig.from_mapping(
+        {
+            "dicom_root": "/a/dicom",
+            "bids_root": "/a/bids",
+            "derivatives_root": "/a/derivatives",
+            "state_file": "/a/state.parquet",
+        }
     )
-    cfg = SchedulerConfig.from_yaml(yaml_file)
     for attr in ("dicom_root", "bids_root", "derivatives_root", "state_file"):
         assert isinstance(getattr(cfg, attr), Path)
 
@@ -165,24 +182,21 @@ def test_from_yaml_empty_file_uses_defaults(tmp_path):
     assert cfg.dicom_root == Path("/data/snbb/dicom")
 
 
-def test_from_yaml_custom_procedures(tmp_path):
-    yaml_file = tmp_path / "config.yaml"
-    yaml_file.write_text(
-        "procedures:\n"
-        "  - name: qsiprep\n"
-        "    output_dir: qsiprep\n"
-        "    script: snbb_run_qsiprep.sh\n"
-        "    scope: session\n"
-        "    depends_on: []\n"
-        "    completion_marker: null\n"
-        "  - name: qsirecon\n"
-        "    output_dir: qsirecon\n"
-        "    script: snbb_run_qsirecon.sh\n"
-        "    scope: session\n"
-        "    depends_on: [qsiprep]\n"
-        "    completion_marker: null\n"
+def test_from_mapping_custom_procedures():
+    cfg = SchedulerConfig.from_mapping(
+        {
+            "procedures": [
+                {"name": "qsiprep", "output_dir": "qsiprep", "script": "snbb_run_qsiprep.sh"},
+                {
+                    "name": "qsirecon",
+                    "output_dir": "qsirecon",
+                    "script": "snbb_run_qsirecon.sh",
+                    "scope": "session",
+                    "depends_on": ["qsiprep"],
+                },
+            ]
+        }
     )
-    cfg = SchedulerConfig.from_yaml(yaml_file)
     assert len(cfg.procedures) == 2
     proc = cfg.procedures[1]
     assert proc.name == "qsirecon"
@@ -190,6 +204,12 @@ def test_from_yaml_custom_procedures(tmp_path):
     assert proc.scope == "session"
 
 
+def test_from_mapping_does_not_modify_input():
+    mapping = {"dicom_root": "/a/dicom", "audit": {"report_dir": "/a/reports"}}
+    SchedulerConfig.from_mapping(mapping)
+    assert mapping == {"dicom_root": "/a/dicom", "audit": {"report_dir": "/a/reports"}}
+
+
 def test_from_yaml_procedures_are_procedure_objects(tmp_path):
     yaml_file = tmp_path / "config.yaml"
     yaml_file.write_text(
@@ -297,14 +317,12 @@ def test_from_yaml_malformed_error_includes_path(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_slurm_log_dir_default_is_none():
-    cfg = SchedulerConfig()
-    assert cfg.slurm_log_dir is None
+def test_slurm_log_dir_default_is_none(default_cfg):
+    assert default_cfg.slurm_log_dir is None
 
 
-def test_log_file_default_is_none():
-    cfg = SchedulerConfig()
-    assert cfg.log_file is None
+def test_log_file_default_is_none(default_cfg):
+    assert default_cfg.log_file is None
 
 
 def test_slurm_log_dir_can_be_set():
@@ -345,24 +363,12 @@ def test_from_yaml_slurm_log_dir_none_stays_none(tmp_path):
 # ---------------------------------------------------------------------------
 
 
-def test_fastsurfer_procedure_absent():
+def test_fastsurfer_procedure_absent(default_cfg):
     """fastsurfer is no longer in DEFAULT_PROCEDURES (replaced by freesurfer longitudinal)."""
-    cfg = SchedulerConfig()
-    names = [p.name for p in cfg.procedures]
+    names = [p.name for p in default_cfg.procedures]
     assert "fastsurfer" not in names
 
 
-def test_freesurfer_longitudinal_attributes():
-    """freesurfer uses longitudinal pipeline with completion_marker=None."""
-    cfg = SchedulerConfig()
-    proc = cfg.get_procedure("freesurfer")
-    assert proc.scope == "subject"
-    assert proc.depends_on == ["bids_post"]
-    assert proc.output_dir == "freesurfer"
-    assert proc.script == "snbb_run_freesurfer.sh"
-    assert proc.completion_marker is None  # specialised longitudinal check
-
-
 def test_freesurfer_uses_derivatives_root():
     """freesurfer writes to derivatives/freesurfer/."""
     cfg = SchedulerConfig(derivatives_root=Path("/data/derivatives"))
@@ -370,17 +376,15 @@ def test_freesurfer_uses_derivatives_root():
     assert cfg.get_procedure_root(proc) == Path("/data/derivatives/freesurfer")
 
 
-def test_freesurfer_comes_before_qsirecon():
+def test_freesurfer_comes_before_qsirecon(default_cfg):
     """freesurfer appears before qsirecon in the default pipeline."""
-    cfg = SchedulerConfig()
-    names = [p.name for p in cfg.procedures]
+    names = [p.name for p in default_cfg.procedures]
     assert names.index("freesurfer") < names.index("qsirecon")
 
 
-def test_qsirecon_depends_on_freesurfer():
+def test_qsirecon_depends_on_freesurfer(default_cfg):
     """qsirecon lists freesurfer (not fastsurfer) as a dependency."""
-    cfg = SchedulerConfig()
-    qsirecon = cfg.get_procedure("qsirecon")
+    qsirecon = default_cfg.get_procedure("qsirecon")
     assert "freesurfer" in qsirecon.depends_on
     assert "fastsurfer" not in qsirecon.depends_on
 
@@ -404,10 +408,9 @@ def test_audit_config_defaults():
     assert audit.smtp_password is None
 
 
-def test_scheduler_config_has_audit():
-    cfg = SchedulerConfig()
-    assert isinstance(cfg.audit, AuditConfig)
-    assert cfg.audit.dicom_min_files == 10
+def test_scheduler_config_has_audit(default_cfg):
+    assert isinstance(default_cfg.audit, AuditConfig)
+    assert default_cfg.audit.dicom_min_files == 10
 
 
 def test_audit_config_custom_values():
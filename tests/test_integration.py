@@ -153,7 +153,7 @@ def add_freesurfer(tmp_path, subject, sessions=None):
 
 def mock_sbatch(job_id="1"):
     m = __import__("unittest.mock", fromlist=["MagicMock"]).MagicMock()
-    m.stdout = f"Submitted batch job {job_id}\n"
+    m.stdout = f"Submitted batch job {job_id}\n".encode()
     return m
 
 
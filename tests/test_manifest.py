@@ -211,7 +211,8 @@ def test_load_state_missing_file_has_correct_columns(cfg):
         assert col in state.columns
 
 
-def test_save_and_load_state_roundtrip(cfg):
+def test_save_and_load_state_roundtrip(tmp_path):
+    cfg = SchedulerConfig(state_file=tmp_path / "state.parquet")
     rows = [
         make_state_row("sub-0001", "ses-01", "bids", "complete"),
         make_state_row("sub-0001", "ses-01", "qsiprep", "running"),
@@ -235,6 +236,21 @@ def test_save_state_creates_parent_dirs(tmp_path):
     assert cfg.state_file.exists()
 
 
+@pytest.mark.parametrize("suffix", [".feather", ".arrow"])
+def test_save_and_load_state_feather_roundtrip(tmp_path, suffix):
+    cfg = SchedulerConfig(state_file=tmp_path / f"state{suffix}")
+    rows = [
+        make_state_row("sub-0001", "ses-01", "bids", "complete"),
+        make_state_row("sub-0002", "ses-01", "bids", "failed", job_id="7"),
+    ]
+    # A filtered frame keeps a non-default index, which feather cannot store
+    state = pd.DataFrame(rows).iloc[[1]]
+    save_state(state, cfg)
+    loaded = load_state(cfg)
+    assert list(loaded["job_id"]) == ["7"]
+    assert cfg.state_file.read_bytes()[:6] == b"ARROW1"
+
+
 def test_load_state_preserves_values(cfg):
     rows = [make_state_row("sub-0001", "ses-01", "bids", "failed", job_id="99")]
     save_state(pd.DataFrame(rows), cfg)
@@ -254,6 +254,21 @@ def test_qsiprep_needed_when_bids_complete_qsiprep_absent(cfg):
     assert rules["qsiprep"](pd.Series(row)) is True
 
 
+def test_rule_does_not_look_up_dependencies_per_row(cfg, monkeypatch):
+    """Dependencies are resolved when the rule is built, not on every call."""
+    row = make_row(cfg)
+    mark_dicom(row)
+    mark_bids_complete(row)
+    mark_bids_post_complete(row)
+    rules = build_rules(cfg)
+
+    def _fail(name):
+        raise AssertionError(f"get_procedure({name!r}) called during evaluation")
+
+    monkeypatch.setattr(cfg, "get_procedure", _fail)
+    assert rules["qsiprep"](pd.Series(row)) is True
+
+
 def test_qsiprep_not_needed_when_already_complete(cfg):
     row = make_row(cfg)
     mark_dicom(row)
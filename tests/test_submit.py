@@ -1,12 +1,21 @@
-"""Tests for submit.py — subprocess.run is mocked throughout."""
+"""Tests for submit.py — subprocess.run is mocked throughout.
+
+The concurrent-submission tests run a stub ``sbatch`` script from PATH instead.
+"""
+import json
+import logging
+import os
+import re
+import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
 import pandas as pd
 import pytest
 
+from snbb_scheduler.audit import AuditLogger
 from snbb_scheduler.config import SchedulerConfig
-from snbb_scheduler.submit import submit_manifest, submit_task
+from snbb_scheduler.submit import SubmissionError, submit_manifest, submit_task
 
 
 # ---------------------------------------------------------------------------
@@ -25,14 +34,9 @@ def cfg(tmp_path):
     )
 
 
-def make_row(subject="sub-0001", session="ses-01", procedure="bids"):
-    return pd.Series({
-        "subject": subject,
-        "session": session,
-        "procedure": procedure,
-        "dicom_path": Path(f"/fake/{subject}/{session}"),
-        "priority": 0,
-    })
+def make_task(subject="sub-0001", session="ses-01", procedure="bids"):
+    """Return the positional ``(procedure, subject, session)`` args for submit_task."""
+    return procedure, subject, session
 
 
 def make_manifest(*rows):
@@ -45,7 +49,7 @@ def make_manifest(*rows):
 
 def mock_sbatch(job_id="12345"):
     m = MagicMock()
-    m.stdout = f"Submitted batch job {job_id}\n"
+    m.stdout = f"Submitted batch job {job_id}\n".encode()
     return m
 
 
@@ -55,7 +59,7 @@ def mock_sbatch(job_id="12345"):
 
 def test_submit_task_calls_sbatch(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     mock_run.assert_called_once()
     cmd = mock_run.call_args[0][0]
     assert cmd[0] == "sbatch"
@@ -63,28 +67,28 @@ def test_submit_task_calls_sbatch(cfg):
 
 def test_submit_task_partition_flag(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     cmd = mock_run.call_args[0][0]
     assert "--partition=debug" in cmd
 
 
 def test_submit_task_account_flag(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     cmd = mock_run.call_args[0][0]
     assert "--account=snbb" in cmd
 
 
 def test_submit_task_job_name_session_scoped(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="bids"), cfg)
+        submit_task(*make_task(procedure="bids"), cfg)
     cmd = mock_run.call_args[0][0]
     assert "--job-name=bids_sub-0001_ses-01" in cmd
 
 
 def test_submit_task_job_name_subject_scoped(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="freesurfer", session=""), cfg)
+        submit_task(*make_task(procedure="freesurfer", session=""), cfg)
     cmd = mock_run.call_args[0][0]
     assert "--job-name=freesurfer_sub-0001" in cmd
     # session must NOT be passed as a script argument
@@ -94,14 +98,14 @@ def test_submit_task_job_name_subject_scoped(cfg):
 
 def test_submit_task_uses_procedure_script(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="bids"), cfg)
+        submit_task(*make_task(procedure="bids"), cfg)
     cmd = mock_run.call_args[0][0]
     assert "snbb_run_bids.sh" in cmd
 
 
 def test_submit_task_passes_subject_and_session(cfg):
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(subject="sub-0042", session="ses-02"), cfg)
+        submit_task(*make_task(subject="sub-0042", session="ses-02"), cfg)
     cmd = mock_run.call_args[0][0]
     assert "sub-0042" in cmd
     assert "ses-02" in cmd
@@ -110,24 +114,16 @@ def test_submit_task_passes_subject_and_session(cfg):
 def test_submit_task_passes_dicom_path_for_session_scoped(cfg):
     """dicom_path is appended as a 3rd script arg for session-scoped procedures."""
     dicom = Path("/data/dicom/session_dir")
-    row = pd.Series({
-        "subject": "sub-0001", "session": "ses-01",
-        "procedure": "bids", "dicom_path": dicom, "priority": 0,
-    })
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(row, cfg)
+        submit_task("bids", "sub-0001", "ses-01", cfg, dicom_path=dicom)
     cmd = mock_run.call_args[0][0]
     assert str(dicom) in cmd
 
 
 def test_submit_task_no_dicom_path_when_none(cfg):
     """When dicom_path is None, no extra arg is appended for session-scoped procedures."""
-    row = pd.Series({
-        "subject": "sub-0001", "session": "ses-01",
-        "procedure": "bids", "dicom_path": None, "priority": 0,
-    })
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(row, cfg)
+        submit_task("bids", "sub-0001", "ses-01", cfg, dicom_path=None)
     cmd = mock_run.call_args[0][0]
     assert cmd[-1] == "ses-01"
 
@@ -135,12 +131,8 @@ def test_submit_task_no_dicom_path_when_none(cfg):
 def test_submit_task_no_dicom_path_for_subject_scoped(cfg):
     """dicom_path is never appended for subject-scoped procedures."""
     dicom = Path("/data/dicom/session_dir")
-    row = pd.Series({
-        "subject": "sub-0001", "session": "",
-        "procedure": "freesurfer", "dicom_path": dicom, "priority": 0,
-    })
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(row, cfg)
+        submit_task("freesurfer", "sub-0001", "", cfg, dicom_path=dicom)
     cmd = mock_run.call_args[0][0]
     assert str(dicom) not in cmd
 
@@ -148,7 +140,7 @@ def test_submit_task_no_dicom_path_for_subject_scoped(cfg):
 def test_submit_task_defacing_job_name(cfg):
     """Defacing is session-scoped → job name includes session."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(subject="sub-0001", session="ses-01", procedure="defacing"), cfg)
+        submit_task(*make_task(subject="sub-0001", session="ses-01", procedure="defacing"), cfg)
     cmd = mock_run.call_args[0][0]
     assert "--job-name=defacing_sub-0001_ses-01" in cmd
 
@@ -156,7 +148,7 @@ def test_submit_task_defacing_job_name(cfg):
 def test_submit_task_defacing_passes_subject_and_session(cfg):
     """Defacing script receives subject and session as positional args."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(subject="sub-0003", session="ses-02", procedure="defacing"), cfg)
+        submit_task(*make_task(subject="sub-0003", session="ses-02", procedure="defacing"), cfg)
     cmd = mock_run.call_args[0][0]
     assert "sub-0003" in cmd
     assert "ses-02" in cmd
@@ -172,19 +164,50 @@ def test_submit_task_script_from_procedure_registry(cfg):
         ("freesurfer", "snbb_run_freesurfer.sh"),
     ]:
         with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-            submit_task(make_row(procedure=proc_name), cfg)
+            submit_task(*make_task(procedure=proc_name), cfg)
         cmd = mock_run.call_args[0][0]
         assert expected_script in cmd, f"{proc_name}: expected {expected_script} in cmd"
 
 
 def test_submit_task_subprocess_flags(cfg):
-    """subprocess.run called with capture_output=True, text=True, check=True."""
+    """subprocess.run captures raw bytes, checks the exit code and keeps fds open."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     _, kwargs = mock_run.call_args
     assert kwargs.get("capture_output") is True
-    assert kwargs.get("text") is True
+    assert not kwargs.get("text")
     assert kwargs.get("check") is True
+    assert kwargs.get("close_fds") is False
+
+
+def test_submit_task_full_command_order(tmp_path):
+    """Flags keep their documented order around the per-task --job-name."""
+    cfg_full = SchedulerConfig(
+        dicom_root=tmp_path / "dicom",
+        bids_root=tmp_path / "bids",
+        derivatives_root=tmp_path / "derivatives",
+        state_file=tmp_path / "state.parquet",
+        slurm_mem="32G",
+        slurm_cpus_per_task=8,
+        slurm_log_dir=tmp_path / "logs",
+    )
+    with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
+        submit_task("bids", "sub-0001", "ses-01", cfg_full, dicom_path="/d")
+    log = tmp_path / "logs" / "bids" / "bids_sub-0001_ses-01_%j"
+    assert mock_run.call_args[0][0] == [
+        "sbatch",
+        "--partition=debug",
+        "--account=snbb",
+        "--job-name=bids_sub-0001_ses-01",
+        "--mem=32G",
+        "--cpus-per-task=8",
+        f"--output={log}.out",
+        f"--error={log}.err",
+        "snbb_run_bids.sh",
+        "sub-0001",
+        "ses-01",
+        "/d",
+    ]
 
 
 # ---------------------------------------------------------------------------
@@ -193,23 +216,32 @@ def test_submit_task_subprocess_flags(cfg):
 
 def test_submit_task_returns_job_id(cfg):
     with patch("subprocess.run", return_value=mock_sbatch("99999")):
-        job_id = submit_task(make_row(), cfg)
+        job_id = submit_task(*make_task(), cfg)
     assert job_id == "99999"
 
 
 def test_submit_task_parses_job_id_from_stdout(cfg):
     with patch("subprocess.run", return_value=mock_sbatch("54321")):
-        job_id = submit_task(make_row(), cfg)
+        job_id = submit_task(*make_task(), cfg)
     assert job_id == "54321"
 
 
+def test_submit_task_job_id_ignores_trailing_text(cfg):
+    """Only the token right after the prefix is taken as the job ID."""
+    m = MagicMock()
+    m.stdout = b"Submitted batch job 4242 on cluster snbb\n"
+    with patch("subprocess.run", return_value=m):
+        job_id = submit_task(*make_task(), cfg)
+    assert job_id == "4242"
+
+
 def test_submit_task_raises_on_unexpected_sbatch_output(cfg):
     """sbatch stdout that doesn't start with 'Submitted batch job' raises RuntimeError."""
     bad_mock = MagicMock()
-    bad_mock.stdout = "Error: some sbatch problem\n"
+    bad_mock.stdout = b"Error: some sbatch problem\n"
     with patch("subprocess.run", return_value=bad_mock):
         with pytest.raises(RuntimeError, match="Unexpected sbatch output"):
-            submit_task(make_row(), cfg)
+            submit_task(*make_task(), cfg)
 
 
 def test_submit_task_mem_flag(tmp_path):
@@ -222,7 +254,7 @@ def test_submit_task_mem_flag(tmp_path):
         slurm_mem="32G",
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg_mem)
+        submit_task(*make_task(), cfg_mem)
     cmd = mock_run.call_args[0][0]
     assert "--mem=32G" in cmd
 
@@ -237,7 +269,7 @@ def test_submit_task_cpus_flag(tmp_path):
         slurm_cpus_per_task=8,
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg_cpus)
+        submit_task(*make_task(), cfg_cpus)
     cmd = mock_run.call_args[0][0]
     assert "--cpus-per-task=8" in cmd
 
@@ -245,7 +277,7 @@ def test_submit_task_cpus_flag(tmp_path):
 def test_submit_task_no_mem_when_none(cfg):
     """--mem flag absent when slurm_mem is None."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     cmd = mock_run.call_args[0][0]
     assert not any(arg.startswith("--mem") for arg in cmd)
 
@@ -253,7 +285,7 @@ def test_submit_task_no_mem_when_none(cfg):
 def test_submit_task_no_cpus_when_none(cfg):
     """--cpus-per-task flag absent when slurm_cpus_per_task is None."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     cmd = mock_run.call_args[0][0]
     assert not any(arg.startswith("--cpus-per-task") for arg in cmd)
 
@@ -269,7 +301,7 @@ def test_submit_task_no_partition_when_empty(tmp_path):
         slurm_account="snbb",
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg_no_partition)
+        submit_task(*make_task(), cfg_no_partition)
     cmd = mock_run.call_args[0][0]
     assert not any(arg.startswith("--partition") for arg in cmd)
 
@@ -280,18 +312,18 @@ def test_submit_task_no_partition_when_empty(tmp_path):
 
 def test_dry_run_does_not_call_subprocess(cfg, capsys):
     with patch("subprocess.run") as mock_run:
-        submit_task(make_row(), cfg, dry_run=True)
+        submit_task(*make_task(), cfg, dry_run=True)
     mock_run.assert_not_called()
 
 
 def test_dry_run_returns_none(cfg):
     with patch("subprocess.run"):
-        result = submit_task(make_row(), cfg, dry_run=True)
+        result = submit_task(*make_task(), cfg, dry_run=True)
     assert result is None
 
 
 def test_dry_run_prints_command(cfg, capsys):
-    submit_task(make_row(procedure="bids"), cfg, dry_run=True)
+    submit_task(*make_task(procedure="bids"), cfg, dry_run=True)
     out = capsys.readouterr().out
     assert "[DRY RUN]" in out
     assert "sbatch" in out
@@ -331,6 +363,12 @@ def test_submit_manifest_state_rows_are_pending(cfg):
     assert (result["status"] == "pending").all()
 
 
+def test_submit_manifest_submitted_at_is_utc_ns(cfg):
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    result = submit_manifest(manifest, cfg, dry_run=True)
+    assert str(result["submitted_at"].dtype) == "datetime64[ns, UTC]"
+
+
 def test_submit_manifest_job_ids_recorded(cfg):
     manifest = make_manifest(("sub-0001", "ses-01", "bids"))
     with patch("subprocess.run", return_value=mock_sbatch("777")):
@@ -346,6 +384,10 @@ def test_submit_manifest_empty_manifest(cfg):
         result = submit_manifest(manifest, cfg)
     mock_run.assert_not_called()
     assert result.empty
+    assert list(result.columns) == [
+        "subject", "session", "procedure", "status", "submitted_at", "job_id",
+    ]
+    assert str(result["submitted_at"].dtype) == "datetime64[ns, UTC]"
 
 
 def test_submit_manifest_dry_run_no_subprocess(cfg, capsys):
@@ -366,6 +408,71 @@ def test_submit_manifest_dry_run_job_ids_are_none(cfg):
     assert result.iloc[0]["job_id"] is None
 
 
+def test_submit_manifest_dry_run_keeps_manifest_rows(cfg):
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "qsiprep"),
+    )
+    result = submit_manifest(manifest, cfg, dry_run=True)
+    assert result[["subject", "session", "procedure"]].values.tolist() == [
+        ["sub-0001", "ses-01", "bids"],
+        ["sub-0002", "ses-01", "qsiprep"],
+    ]
+    assert result["job_id"].isna().all()
+    assert (result["status"] == "pending").all()
+
+
+def test_submit_task_accepts_procedure_object(cfg):
+    """A resolved Procedure can be passed instead of its name."""
+    proc = cfg.get_procedure("qsiprep")
+    with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
+        submit_task(proc, "sub-0001", "ses-01", cfg)
+    cmd = mock_run.call_args[0][0]
+    assert "--job-name=qsiprep_sub-0001_ses-01" in cmd
+    assert "snbb_run_qsiprep.sh" in cmd
+
+
+def test_submit_manifest_resolves_each_procedure_once(cfg):
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "bids"),
+        ("sub-0003", "ses-01", "qsiprep"),
+    )
+    with patch("subprocess.run", return_value=mock_sbatch()), \
+         patch.object(SchedulerConfig, "get_procedure", wraps=cfg.get_procedure) as get_proc:
+        submit_manifest(manifest, cfg)
+    assert sorted(c.args[0] for c in get_proc.call_args_list) == ["bids", "qsiprep"]
+
+
+def test_submit_manifest_job_names_follow_scope(cfg):
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0001", "", "freesurfer"),
+    )
+    with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
+        submit_manifest(manifest, cfg)
+    names = [
+        next(a for a in c.args[0] if a.startswith("--job-name="))
+        for c in mock_run.call_args_list
+    ]
+    assert names == ["--job-name=bids_sub-0001_ses-01", "--job-name=freesurfer_sub-0001"]
+
+
+def test_submit_task_uses_given_job_name(cfg):
+    with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
+        submit_task(*make_task(), cfg, job_name="custom")
+    assert "--job-name=custom" in mock_run.call_args[0][0]
+
+
+def test_submit_manifest_passes_dicom_path(cfg):
+    """dicom_path from the manifest reaches the sbatch command line."""
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
+        submit_manifest(manifest, cfg)
+    cmd = mock_run.call_args[0][0]
+    assert cmd[-1] == str(Path("/fake/sub-0001/ses-01"))
+
+
 def test_submit_manifest_one_row_per_task(cfg):
     manifest = make_manifest(
         ("sub-0001", "ses-01", "bids"),
@@ -392,7 +499,7 @@ def test_submit_task_output_flag_when_log_dir_set(tmp_path):
         slurm_log_dir=log_dir,
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="bids"), cfg_log)
+        submit_task(*make_task(procedure="bids"), cfg_log)
     cmd = mock_run.call_args[0][0]
     assert any(arg.startswith("--output=") for arg in cmd)
 
@@ -408,7 +515,7 @@ def test_submit_task_error_flag_when_log_dir_set(tmp_path):
         slurm_log_dir=log_dir,
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="bids"), cfg_log)
+        submit_task(*make_task(procedure="bids"), cfg_log)
     cmd = mock_run.call_args[0][0]
     assert any(arg.startswith("--error=") for arg in cmd)
 
@@ -416,7 +523,7 @@ def test_submit_task_error_flag_when_log_dir_set(tmp_path):
 def test_submit_task_no_log_flags_when_log_dir_none(cfg):
     """--output and --error absent when slurm_log_dir is None."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(), cfg)
+        submit_task(*make_task(), cfg)
     cmd = mock_run.call_args[0][0]
     assert not any(arg.startswith("--output=") for arg in cmd)
     assert not any(arg.startswith("--error=") for arg in cmd)
@@ -433,7 +540,7 @@ def test_submit_task_log_dir_contains_procedure_subdir(tmp_path):
         slurm_log_dir=log_dir,
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(procedure="bids"), cfg_log)
+        submit_task(*make_task(procedure="bids"), cfg_log)
     cmd = mock_run.call_args[0][0]
     output_flag = next(a for a in cmd if a.startswith("--output="))
     assert "/bids/" in output_flag
@@ -450,32 +557,51 @@ def test_submit_task_log_dir_subdir_created(tmp_path):
         slurm_log_dir=log_dir,
     )
     with patch("subprocess.run", return_value=mock_sbatch()):
-        submit_task(make_row(procedure="bids"), cfg_log)
+        submit_task(*make_task(procedure="bids"), cfg_log)
     assert (log_dir / "bids").is_dir()
 
 
+def test_dry_run_quotes_arguments_with_spaces(cfg, capsys):
+    submit_task("bids", "sub-0001", "ses-01", cfg, dry_run=True, dicom_path="/data/my dicom")
+    out = capsys.readouterr().out
+    assert "'/data/my dicom'" in out
+
+
+def test_dry_run_does_not_create_log_dir(tmp_path):
+    """A dry run has no filesystem side effects, even with slurm_log_dir set."""
+    log_dir = tmp_path / "slurm_logs"
+    cfg_log = SchedulerConfig(
+        dicom_root=tmp_path / "dicom",
+        bids_root=tmp_path / "bids",
+        derivatives_root=tmp_path / "derivatives",
+        state_file=tmp_path / "state.parquet",
+        slurm_log_dir=log_dir,
+    )
+    submit_task(*make_task(procedure="bids"), cfg_log, dry_run=True)
+    assert not log_dir.exists()
+
+
 # ---------------------------------------------------------------------------
 # submit_task — audit logging
 # ---------------------------------------------------------------------------
 
 def test_submit_task_audit_submitted(cfg):
-    from unittest.mock import MagicMock
     audit = MagicMock()
     with patch("subprocess.run", return_value=mock_sbatch("555")):
-        submit_task(make_row(subject="sub-0001", session="ses-01", procedure="bids"), cfg, audit=audit)
+        submit_task(*make_task(subject="sub-0001", session="ses-01", procedure="bids"), cfg, audit=audit)
     audit.log.assert_called_once_with(
         "submitted",
         subject="sub-0001",
         session="ses-01",
         procedure="bids",
         job_id="555",
+        timestamp=None,
     )
 
 
 def test_submit_task_audit_dry_run(cfg):
-    from unittest.mock import MagicMock
     audit = MagicMock()
-    submit_task(make_row(subject="sub-0001", session="ses-01", procedure="bids"), cfg, dry_run=True, audit=audit)
+    submit_task(*make_task(subject="sub-0001", session="ses-01", procedure="bids"), cfg, dry_run=True, audit=audit)
     audit.log.assert_called_once()
     args, kwargs = audit.log.call_args
     assert args[0] == "dry_run"
@@ -483,15 +609,36 @@ def test_submit_task_audit_dry_run(cfg):
     assert "detail" in kwargs
 
 
+def test_dry_run_audit_detail_is_unquoted(cfg):
+    audit = MagicMock()
+    submit_task(*make_task(), cfg, dry_run=True, audit=audit, dicom_path="/data/my dicom")
+    assert audit.log.call_args.kwargs["detail"].endswith("ses-01 /data/my dicom")
+
+
+def test_live_submit_logs_command_at_info(cfg, caplog):
+    caplog.set_level(logging.INFO, logger="snbb_scheduler.submit")
+    with patch("subprocess.run", return_value=mock_sbatch("1")):
+        submit_task(*make_task(), cfg, dicom_path="/data/my dicom")
+    assert "ses-01 '/data/my dicom'" in caplog.text
+
+
+def test_live_submit_skips_quoting_when_info_disabled(cfg, capsys, caplog):
+    caplog.set_level(logging.WARNING, logger="snbb_scheduler.submit")
+    with patch("subprocess.run", return_value=mock_sbatch("1")), \
+            patch("snbb_scheduler.submit.shlex.join") as mock_join:
+        submit_task(*make_task(), cfg, dicom_path="/data/my dicom")
+    mock_join.assert_not_called()
+    assert "snbb_run_bids.sh sub-0001 ses-01 /data/my dicom" in capsys.readouterr().out
+
+
 def test_submit_task_no_audit_no_error(cfg):
     """audit=None still works — no AttributeError."""
     with patch("subprocess.run", return_value=mock_sbatch("1")):
-        submit_task(make_row(), cfg, audit=None)
+        submit_task(*make_task(), cfg, audit=None)
 
 
 def test_submit_manifest_audit_passed_through(cfg):
     """submit_manifest passes audit to each submit_task call."""
-    from unittest.mock import MagicMock
     audit = MagicMock()
     manifest = make_manifest(
         ("sub-0001", "ses-01", "bids"),
@@ -502,15 +649,44 @@ def test_submit_manifest_audit_passed_through(cfg):
     assert audit.log.call_count == 2
 
 
+def test_submit_manifest_audit_shares_one_timestamp(cfg):
+    """Every audit event from one manifest carries the rows' submitted_at."""
+    audit = MagicMock()
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "bids"),
+    )
+    with patch("subprocess.run", return_value=mock_sbatch("10")):
+        result = submit_manifest(manifest, cfg, audit=audit)
+    stamps = {c.kwargs["timestamp"] for c in audit.log.call_args_list}
+    assert stamps == {result.iloc[0]["submitted_at"].floor("us").to_pydatetime()}
+
+
+def test_submit_manifest_audit_timestamp_has_microsecond_precision(cfg, tmp_path):
+    """The audit log keeps isoformat() microseconds, not the state's nanoseconds."""
+    log_file = tmp_path / "audit.jsonl"
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    with patch("subprocess.run", return_value=mock_sbatch("10")):
+        submit_manifest(manifest, cfg, audit=AuditLogger(log_file))
+    stamp = json.loads(log_file.read_text())["timestamp"]
+    assert re.fullmatch(r"[^.]+(\.\d{6})?\+00:00", stamp)
+
+
+def test_submit_manifest_batches_audit_writes(cfg):
+    audit = MagicMock()
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    with patch("subprocess.run", return_value=mock_sbatch("10")):
+        submit_manifest(manifest, cfg, audit=audit)
+    audit.batch.assert_called_once_with()
+
+
 def test_submit_task_audit_error_on_called_process_error(cfg):
     """audit.log('error', ...) called when sbatch raises CalledProcessError."""
-    import subprocess
-    from unittest.mock import MagicMock
     audit = MagicMock()
     exc = subprocess.CalledProcessError(1, "sbatch")
     with patch("subprocess.run", side_effect=exc):
         with pytest.raises(subprocess.CalledProcessError):
-            submit_task(make_row(), cfg, audit=audit)
+            submit_task(*make_task(), cfg, audit=audit)
     audit.log.assert_called_once()
     args, kwargs = audit.log.call_args
     assert args[0] == "error"
@@ -518,11 +694,10 @@ def test_submit_task_audit_error_on_called_process_error(cfg):
 
 def test_submit_task_no_audit_on_called_process_error_no_crash(cfg):
     """audit=None doesn't crash when CalledProcessError is raised."""
-    import subprocess
     exc = subprocess.CalledProcessError(1, "sbatch")
     with patch("subprocess.run", side_effect=exc):
         with pytest.raises(subprocess.CalledProcessError):
-            submit_task(make_row(), cfg, audit=None)
+            submit_task(*make_task(), cfg, audit=None)
 
 
 def test_submit_task_log_filenames_contain_job_name(tmp_path):
@@ -536,7 +711,7 @@ def test_submit_task_log_filenames_contain_job_name(tmp_path):
         slurm_log_dir=log_dir,
     )
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(make_row(subject="sub-0001", session="ses-01", procedure="bids"), cfg_log)
+        submit_task(*make_task(subject="sub-0001", session="ses-01", procedure="bids"), cfg_log)
     cmd = mock_run.call_args[0][0]
     output_flag = next(a for a in cmd if a.startswith("--output="))
     assert "bids_sub-0001_ses-01" in output_flag
@@ -551,7 +726,7 @@ def test_submit_freesurfer_longitudinal_is_subject_scoped(cfg):
     """freesurfer passes only subject (no session) to the script."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
         submit_task(
-            make_row(subject="sub-0001", session="", procedure="freesurfer"), cfg
+            *make_task(subject="sub-0001", session="", procedure="freesurfer"), cfg
         )
     cmd = mock_run.call_args[0][0]
     assert "snbb_run_freesurfer.sh" in cmd
@@ -565,7 +740,7 @@ def test_submit_freesurfer_longitudinal_job_name(cfg):
     """freesurfer job name includes only subject (subject-scoped)."""
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
         submit_task(
-            make_row(subject="sub-0001", session="", procedure="freesurfer"), cfg
+            *make_task(subject="sub-0001", session="", procedure="freesurfer"), cfg
         )
     cmd = mock_run.call_args[0][0]
     assert "--job-name=freesurfer_sub-0001" in cmd
@@ -574,11 +749,125 @@ def test_submit_freesurfer_longitudinal_job_name(cfg):
 def test_submit_freesurfer_longitudinal_no_dicom_path(cfg):
     """dicom_path is never appended for subject-scoped freesurfer."""
     dicom = Path("/data/dicom/session_dir")
-    row = pd.Series({
-        "subject": "sub-0001", "session": "",
-        "procedure": "freesurfer", "dicom_path": dicom, "priority": 0,
-    })
     with patch("subprocess.run", return_value=mock_sbatch()) as mock_run:
-        submit_task(row, cfg)
+        submit_task("freesurfer", "sub-0001", "", cfg, dicom_path=dicom)
     cmd = mock_run.call_args[0][0]
     assert str(dicom) not in cmd
+
+
+# ---------------------------------------------------------------------------
+# submit_manifest — concurrent submission
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_sbatch(tmp_path, monkeypatch):
+    """Put an ``sbatch`` stub on PATH that echoes the job name as the job ID.
+
+    Exits non-zero when the job name contains ``fail`` and sleeps briefly
+    when it contains ``slow``.
+    """
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "sbatch"
+    script.write_text(
+        "#!/bin/sh\n"
+        "for a in \"$@\"; do case $a in --job-name=*) name=${a#--job-name=};; esac; done\n"
+        "case $name in *fail*) echo boom >&2; exit 3;; *slow*) sleep 0.3;; esac\n"
+        "echo \"Submitted batch job $name\"\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+
+
+@pytest.fixture
+def cfg_concurrent(cfg):
+    cfg.slurm_max_concurrent_submits = 4
+    return cfg
+
+
+def test_submit_manifest_concurrent_keeps_manifest_order(cfg_concurrent, fake_sbatch):
+    manifest = make_manifest(
+        *[(f"sub-{i:04d}", "ses-01", "bids") for i in range(6)]
+    )
+    result = submit_manifest(manifest, cfg_concurrent)
+    assert result["job_id"].tolist() == [
+        f"bids_sub-{i:04d}_ses-01" for i in range(6)
+    ]
+    assert (result["status"] == "pending").all()
+
+
+def test_submit_manifest_concurrent_does_not_use_subprocess_run(cfg_concurrent, fake_sbatch):
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    with patch("subprocess.run") as mock_run:
+        submit_manifest(manifest, cfg_concurrent)
+    mock_run.assert_not_called()
+
+
+def test_submit_manifest_concurrent_audits_in_order(cfg_concurrent, fake_sbatch):
+    audit = MagicMock()
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "bids"),
+    )
+    submit_manifest(manifest, cfg_concurrent, audit=audit)
+    assert [c.args[0] for c in audit.log.call_args_list] == ["submitted", "submitted"]
+    assert [c.kwargs["subject"] for c in audit.log.call_args_list] == [
+        "sub-0001", "sub-0002",
+    ]
+
+
+def test_submit_manifest_concurrent_failure_audited_and_raised(cfg_concurrent, fake_sbatch):
+    audit = MagicMock()
+    manifest = make_manifest(
+        ("sub-fail", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "bids"),
+    )
+    with pytest.raises(SubmissionError) as excinfo:
+        submit_manifest(manifest, cfg_concurrent, audit=audit)
+    assert isinstance(excinfo.value.__cause__, subprocess.CalledProcessError)
+    assert excinfo.value.submitted["job_id"].tolist() == ["bids_sub-0002_ses-01"]
+    events = [(c.args[0], c.kwargs["subject"]) for c in audit.log.call_args_list]
+    assert events == [("error", "sub-fail"), ("submitted", "sub-0002")]
+
+
+def test_submit_manifest_concurrent_stops_launching_after_failure(
+    cfg_concurrent, fake_sbatch, capsys
+):
+    """Commands still queued when a submission fails are never started."""
+    cfg_concurrent.slurm_max_concurrent_submits = 2
+    manifest = make_manifest(
+        ("sub-fail", "ses-01", "bids"),
+        ("sub-slow", "ses-01", "bids"),
+        ("sub-0003", "ses-01", "bids"),
+        ("sub-0004", "ses-01", "bids"),
+    )
+    with pytest.raises(SubmissionError) as excinfo:
+        submit_manifest(manifest, cfg_concurrent)
+    submitted = excinfo.value.submitted
+    assert submitted["subject"].tolist() == ["sub-slow"]
+    assert submitted["job_id"].tolist() == ["bids_sub-slow_ses-01"]
+    assert "sub-0003" not in capsys.readouterr().out
+
+
+def test_submit_manifest_serial_failure_keeps_earlier_submissions(cfg):
+    manifest = make_manifest(
+        ("sub-0001", "ses-01", "bids"),
+        ("sub-0002", "ses-01", "bids"),
+        ("sub-0003", "ses-01", "bids"),
+    )
+    outcomes = [mock_sbatch("1"), subprocess.CalledProcessError(1, "sbatch")]
+    with patch("subprocess.run", side_effect=outcomes) as mock_run:
+        with pytest.raises(SubmissionError) as excinfo:
+            submit_manifest(manifest, cfg)
+    assert mock_run.call_count == 2
+    submitted = excinfo.value.submitted
+    assert submitted[["subject", "job_id"]].values.tolist() == [["sub-0001", "1"]]
+    assert str(submitted["submitted_at"].dtype) == "datetime64[ns, UTC]"
+
+
+def test_submit_manifest_concurrent_dry_run_stays_serial(cfg_concurrent, capsys):
+    manifest = make_manifest(("sub-0001", "ses-01", "bids"))
+    with patch("asyncio.run") as mock_async_run:
+        submit_manifest(manifest, cfg_concurrent, dry_run=True)
+    mock_async_run.assert_not_called()
+    assert "[DRY RUN]" in capsys.readouterr().out